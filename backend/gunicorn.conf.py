@@ -0,0 +1,47 @@
+import os
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+# Runtime state lives outside the source tree: in the service's runtime
+# directory under systemd, otherwise in the system temp directory.
+runtime_dir = Path(os.getenv('RUNTIME_DIRECTORY') or tempfile.gettempdir()) / 'ipo-analyzer'
+runtime_dir.mkdir(parents=True, exist_ok=True)
+
+# Shared by all workers so an async job can be polled from any of them.
+os.environ.setdefault('JOB_STORE_PATH', str(runtime_dir / 'jobs.sqlite3'))
+# Touched by /api/ipo/sector-averages/invalidate so every worker reloads.
+os.environ.setdefault('SECTOR_AVERAGES_STAMP_PATH', str(runtime_dir / 'sector-averages.stamp'))
+
+wsgi_app = 'main:create_app()'
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+workers = int(os.getenv('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+# Threaded workers, since most of a query is spent waiting on Reddit,
+# NewsAPI and DRHP downloads, and query streams hold a thread open.
+worker_class = 'gthread'
+threads = int(os.getenv('WEB_THREADS', 8))
+
+# Import the app, model, VADER lexicon and sector averages once in the
+# master; forked workers share those pages copy-on-write.
+preload_app = True
+
+# Recycle workers periodically to bound memory growth, staggered so they
+# do not all restart together.
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 100))
+timeout = int(os.getenv('WEB_TIMEOUT', 120))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 60))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+def post_fork(server, worker):
+    import main
+    main.init_worker()
+
+def worker_exit(server, worker):
+    import main
+    main.shutdown_worker()
@@ -1,17 +1,28 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from supabase import create_client, Client
 import os
 from dotenv import load_dotenv
 import json
+import time
+import queue
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 import sys
 
 sys.path.append(str(Path(__file__).parent / 'python'))
-from module_a import predict_ipo_success
-from module_b import download_pdf, extract_drhp_data
-from module_c import scrape_reddit_mentions, scrape_news_headlines, calculate_sentiment_score
+from module_a import predict_ipo_success, predict_ipo_success_batch, prediction_cache_stats, get_model, get_model_version
+from module_b import drhp_extraction_stats
+from drhp_cache import get_drhp_data, drhp_cache_stats
+from drhp_worker import drhp_worker_stats, shutdown_worker_pool
+from http_client import http_client_stats
+from refresh_scheduler import RefreshScheduler, WatchlistFullError
+from query_cache import QueryCache
+from sector_averages import SectorAveragesCache
+from job_queue import JobQueue, QueueFullError
+from module_c import refresh_reddit_sentiment, refresh_news_sentiment, sentiment_snapshot, combine_sentiment, preload_sentiment_analyzer, shutdown_sentiment_pool, sentiment_cache_stats, sentiment_refresh_stats
 
 load_dotenv()
 
@@ -21,9 +32,60 @@ CORS(app)
 supabase_url = os.getenv('SUPABASE_URL')
 supabase_key = os.getenv('SUPABASE_ANON_KEY')
 
+BATCH_PREDICT_MAX_RECORDS = int(os.getenv('BATCH_PREDICT_MAX_RECORDS', 10000))
+QUERY_DEADLINE_SECONDS = float(os.getenv('QUERY_DEADLINE_SECONDS', 45))
+QUERY_FRESH_SECONDS = 3600
+QUERY_SOURCE_WORKERS = int(os.getenv('QUERY_SOURCE_WORKERS', 8))
+QUERY_DRHP_WORKERS = int(os.getenv('QUERY_DRHP_WORKERS', 4))
+QUERY_STREAM_KEEPALIVE_SECONDS = float(os.getenv('QUERY_STREAM_KEEPALIVE_SECONDS', 15))
+
+# One pool per source: DRHP calls left running past a query's deadline
+# can take minutes, and must not hold the threads sentiment lookups need.
+_query_source_pools = {
+    'reddit': ThreadPoolExecutor(max_workers=QUERY_SOURCE_WORKERS, thread_name_prefix='query-reddit'),
+    'news': ThreadPoolExecutor(max_workers=QUERY_SOURCE_WORKERS, thread_name_prefix='query-news'),
+    'drhp': ThreadPoolExecutor(max_workers=QUERY_DRHP_WORKERS, thread_name_prefix='query-drhp')
+}
+
+def _connect_supabase():
+    if supabase_url and supabase_key:
+        return create_client(supabase_url, supabase_key)
+    return None
+
+# Built by init_app_state rather than at import: spawned DRHP workers
+# re-import this module as __mp_main__ and should not pay for any of it.
 supabase: Client = None
-if supabase_url and supabase_key:
-    supabase = create_client(supabase_url, supabase_key)
+sector_averages = None
+refresh_scheduler = None
+query_cache = None
+job_queue = None
+
+def _load_sector_averages():
+    if not supabase:
+        return []
+    return supabase.table('sector_averages').select('*').execute().data
+
+def init_app_state():
+    global supabase, sector_averages, refresh_scheduler, query_cache, job_queue
+    if refresh_scheduler is not None:
+        return
+    supabase = _connect_supabase()
+    sector_averages = SectorAveragesCache(_load_sector_averages)
+    refresh_scheduler = RefreshScheduler(refresh_watched_ipo)
+    query_cache = QueryCache()
+    job_queue = JobQueue()
+
+def preload_app_state():
+    # Under a preforking server this runs once in the master, so workers
+    # share the model, lexicon and sector averages copy-on-write.
+    init_app_state()
+    get_model()
+    preload_sentiment_analyzer()
+    sector_averages.load()
+
+def create_app():
+    preload_app_state()
+    return app
 
 @app.route('/api/health', methods=['GET'])
 def health():
@@ -34,6 +96,23 @@ def health():
         'database': db_status
     })
 
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'modelVersion': get_model_version(),
+        'predictionCache': prediction_cache_stats(),
+        'drhpCache': drhp_cache_stats(),
+        'drhpExtraction': drhp_extraction_stats(),
+        'drhpWorker': drhp_worker_stats(),
+        'httpClient': http_client_stats(),
+        'sentimentCache': sentiment_cache_stats(),
+        'sentimentRefresh': sentiment_refresh_stats(),
+        'watchlist': refresh_scheduler.stats(),
+        'queryCache': query_cache.stats(),
+        'sectorAverages': sector_averages.stats(),
+        'jobs': job_queue.stats()
+    })
+
 @app.route('/api/ipo/query', methods=['POST'])
 def query_ipo():
     data = request.json
@@ -45,127 +124,353 @@ def query_ipo():
     if not company_name or not symbol:
         return jsonify({'error': 'Company name and symbol are required'}), 400
     
+    # Async mode hands the pipeline to the job queue and answers at once;
+    # the client polls /api/ipo/jobs/<id> for the result.
+    if data.get('async') or request.args.get('async', '').lower() in ('1', 'true'):
+        try:
+            job = job_queue.submit(answer_query, company_name, symbol, sector, drhp_url)
+        except QueueFullError as e:
+            response = jsonify({'error': 'Query queue is full, try again shortly', 'detail': str(e)})
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        response = jsonify({**job, 'statusUrl': f"/api/ipo/jobs/{job['jobId']}"})
+        response.headers['Location'] = f"/api/ipo/jobs/{job['jobId']}"
+        return response, 202
+    
     try:
-        if supabase:
-            existing = supabase.table('live_queries').select('*').eq('symbol', symbol).order('query_date', desc=True).limit(1).execute()
-            if existing.data and len(existing.data) > 0:
-                existing_query = existing.data[0]
-                query_date_str = existing_query['query_date']
-                if isinstance(query_date_str, str):
-                    query_date = datetime.fromisoformat(query_date_str.replace('Z', '+00:00'))
-                else:
-                    query_date = query_date_str
-                if (datetime.now().timestamp() - query_date.timestamp()) < 3600:
-                    return format_query_response(existing_query)
+        return jsonify(answer_query(company_name, symbol, sector, drhp_url))
         
-        query_data = {
-            'company_name': company_name,
-            'symbol': symbol,
-            'sector': sector,
-            'drhp_data': {},
-            'sentiment_data': {},
-            'ml_prediction': {},
-            'risk_flags': {}
-        }
-        
-        pdf_path = download_pdf(drhp_url) if drhp_url else None
-        if pdf_path and os.path.exists(pdf_path):
+    except Exception as e:
+        return jsonify({'error': 'Failed to process IPO query'}), 500
+
+@app.route('/api/ipo/query/stream', methods=['POST'])
+def query_ipo_stream():
+    data = request.get_json(silent=True) or {}
+    company_name = data.get('companyName')
+    symbol = data.get('symbol')
+    sector = data.get('sector', 'General')
+    drhp_url = data.get('drhpUrl', '')
+    
+    if not company_name or not symbol:
+        return jsonify({'error': 'Company name and symbol are required'}), 400
+    
+    events = queue.Queue()
+    
+    def produce():
+        try:
+            result = answer_query(company_name, symbol, sector, drhp_url, on_event=lambda event, payload: events.put((event, payload)))
+            events.put(('result', result))
+        except Exception:
+            events.put(('error', {'error': 'Failed to process IPO query'}))
+    
+    # The pipeline runs on its own thread and reports each stage through
+    # the queue; if the client goes away it still finishes and is cached.
+    threading.Thread(target=produce, name=f'query-stream-{symbol}', daemon=True).start()
+    
+    def stream():
+        while True:
             try:
-                drhp = extract_drhp_data(pdf_path)
-                query_data['drhp_data'] = {
-                    'ofsRatio': drhp.get('ofsRatio', 0.5),
-                    'freshIssue': drhp.get('freshIssue', 0),
-                    'totalIssueSize': drhp.get('totalIssueSize', 0),
-                    'extractedAt': datetime.now().isoformat(),
-                    'pdfSource': drhp.get('pdfSource')
-                }
-            finally:
-                if os.path.exists(pdf_path):
-                    os.unlink(pdf_path)
+                event, payload = events.get(timeout=QUERY_STREAM_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'event: {event}\ndata: {json.dumps(payload, default=str)}\n\n'
+            if event in ('result', 'error'):
+                return
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@app.route('/api/ipo/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    if job['status'] == 'failed':
+        job['error'] = 'Failed to process IPO query'
+    return jsonify(job)
+
+def answer_query(company_name, symbol, sector, drhp_url, on_event=None):
+    # latest() only has results in the worker leading the watchlist; the
+    # others find the same refresh through the live_queries row run_query
+    # reads first.
+    watched = refresh_scheduler.latest(symbol, max_age=QUERY_FRESH_SECONDS)
+    if watched is not None:
+        return watched
+    
+    # Concurrent queries for one symbol share a single lookup and
+    # pipeline run instead of each starting their own; streaming callers
+    # that join it still get every stage event.
+    return query_cache.get_or_compute(
+        symbol,
+        lambda publish: run_query(company_name, symbol, sector, drhp_url, publish),
+        cacheable=_all_sources_ok,
+        on_event=on_event
+    )
+
+def run_query(company_name, symbol, sector, drhp_url, on_event=None):
+    if supabase:
+        existing = supabase.table('live_queries').select('*').eq('symbol', symbol).order('query_date', desc=True).limit(1).execute()
+        if existing.data and len(existing.data) > 0:
+            existing_query = existing.data[0]
+            query_date_str = existing_query['query_date']
+            if isinstance(query_date_str, str):
+                query_date = datetime.fromisoformat(query_date_str.replace('Z', '+00:00'))
+            else:
+                query_date = query_date_str
+            if (datetime.now().timestamp() - query_date.timestamp()) < QUERY_FRESH_SECONDS:
+                return format_query_dict(existing_query)
+    
+    query_data, sources = build_query_data(company_name, symbol, sector, drhp_url, on_event)
+    return save_query(query_data, sources)
+
+def _all_sources_ok(response):
+    # A result assembled around a timed-out or failed source is served once
+    # but not cached, so the next query gets another chance at the full data.
+    return all(source.get('status') in ('ok', 'skipped') for source in response.get('sources', {}).values())
+
+def _save_latest_query(query_data):
+    # Scheduler refreshes rewrite the symbol's newest live_queries row
+    # rather than adding one per interval, which would push user queries
+    # out of the dashboard's recent list. Bumping query_date lets
+    # run_query in any worker serve the refreshed row as fresh.
+    query_data = {**query_data, 'query_date': datetime.now(timezone.utc).isoformat()}
+    latest = supabase.table('live_queries').select('id').eq('symbol', query_data['symbol']).order('query_date', desc=True).limit(1).execute()
+    if latest.data:
+        return supabase.table('live_queries').update(query_data).eq('id', latest.data[0]['id']).execute()
+    return supabase.table('live_queries').insert(query_data).execute()
+
+def save_query(query_data, sources, replace_latest=False):
+    if supabase:
+        if replace_latest:
+            result = _save_latest_query(query_data)
         else:
-            query_data['drhp_data'] = {
-                'ofsRatio': 0.5,
-                'freshIssue': 0,
-                'totalIssueSize': 0,
-                'extractedAt': datetime.now().isoformat(),
-                'pdfSource': None
-            }
-        
-        reddit_mentions = scrape_reddit_mentions(company_name)
-        news_headlines = scrape_news_headlines(company_name)
-        all_texts = reddit_mentions + news_headlines
-        vader_score = calculate_sentiment_score(all_texts)
-        
-        query_data['sentiment_data'] = {
-            'vaderScore': round(vader_score, 4),
-            'redditMentions': len(reddit_mentions),
-            'newsHeadlines': len(news_headlines),
-            'scrapedAt': datetime.now().isoformat()
-        }
-        
-        ml_input = json.dumps({
-            'issueSize': query_data['drhp_data'].get('totalIssueSize', 0),
-            'qibSubscription': 1.0,
-            'hniSubscription': 1.0,
-            'retailSubscription': 1.0,
-            'peRatio': 20.0,
-            'ofsPercentage': query_data['drhp_data'].get('ofsRatio', 0.5),
-            'gmpListingDay': query_data['sentiment_data'].get('vaderScore', 0)
-        })
-        
-        ml = predict_ipo_success(ml_input)
-        query_data['ml_prediction'] = {
-            'successProbability': ml.get('probability', 0.5),
-            'riskScore': ml.get('riskScore', 0.5),
-            'predictedAt': datetime.now().isoformat()
-        }
-        
-        if supabase:
-            sector_avg = supabase.table('sector_averages').select('*').eq('sector', sector).execute()
-            if sector_avg.data and len(sector_avg.data) > 0:
-                avg = sector_avg.data[0]
-                drhp_data = query_data.get('drhp_data', {})
-                sentiment_data = query_data.get('sentiment_data', {})
-                if drhp_data.get('ofsRatio') is not None:
-                    query_data['risk_flags']['highOFSRatio'] = drhp_data['ofsRatio'] > avg['average_ofs_ratio']
-                if sentiment_data.get('vaderScore') is not None:
-                    query_data['risk_flags']['highHypeScore'] = sentiment_data['vaderScore'] > avg['average_sentiment_score']
-                query_data['risk_flags']['exceedsSectorAverage'] = (
-                    query_data['risk_flags'].get('highOFSRatio', False) and
-                    query_data['risk_flags'].get('highHypeScore', False)
-                )
-            
             result = supabase.table('live_queries').insert(query_data).execute()
-            if result.data:
-                return format_query_response(result.data[0])
-        
-        return jsonify({
-            '_id': 'local_temp_id',
-            'companyName': query_data['company_name'],
-            'symbol': query_data['symbol'],
-            'sector': query_data.get('sector'),
-            'queryDate': datetime.now().isoformat(),
-            'drhpData': query_data.get('drhp_data', {}),
-            'sentimentData': query_data.get('sentiment_data', {}),
-            'mlPrediction': query_data.get('ml_prediction', {}),
-            'riskFlags': query_data.get('risk_flags', {})
-        })
-        
+        if result.data:
+            response = format_query_dict(result.data[0])
+            response['sources'] = sources
+            return response
+    
+    return {
+        '_id': 'local_temp_id',
+        'companyName': query_data['company_name'],
+        'symbol': query_data['symbol'],
+        'sector': query_data.get('sector'),
+        'queryDate': datetime.now().isoformat(),
+        'drhpData': query_data.get('drhp_data', {}),
+        'sentimentData': query_data.get('sentiment_data', {}),
+        'mlPrediction': query_data.get('ml_prediction', {}),
+        'riskFlags': query_data.get('risk_flags', {}),
+        'sources': sources
+    }
+
+def refresh_watched_ipo(entry):
+    query_data, sources = build_query_data(entry['companyName'], entry['symbol'], entry['sector'], entry['drhpUrl'])
+    return save_query(query_data, sources, replace_latest=True)
+
+
+@app.route('/api/ipo/watchlist', methods=['GET'])
+def get_watchlist():
+    return jsonify(refresh_scheduler.watchlist())
+
+@app.route('/api/ipo/watchlist', methods=['POST'])
+def add_to_watchlist():
+    data = request.get_json(silent=True) or {}
+    company_name = data.get('companyName')
+    symbol = data.get('symbol')
+    
+    if not company_name or not symbol:
+        return jsonify({'error': 'Company name and symbol are required'}), 400
+    
+    try:
+        entry = refresh_scheduler.add(symbol, company_name, data.get('sector', 'General'), data.get('drhpUrl', ''))
+    except WatchlistFullError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(entry), 201
+
+@app.route('/api/ipo/watchlist/<symbol>', methods=['DELETE'])
+def remove_from_watchlist(symbol):
+    if not refresh_scheduler.remove(symbol):
+        return jsonify({'error': 'Symbol is not on the watchlist'}), 404
+    return jsonify({'removed': symbol})
+
+def _timed_call(fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args), None, time.perf_counter() - start
     except Exception as e:
-        return jsonify({'error': 'Failed to process IPO query'}), 500
+        return None, e, time.perf_counter() - start
 
-def format_query_response(query):
-    return jsonify({
-        '_id': query['id'],
-        'companyName': query['company_name'],
-        'symbol': query['symbol'],
-        'sector': query.get('sector'),
-        'queryDate': query['query_date'],
-        'drhpData': query.get('drhp_data', {}),
-        'sentimentData': query.get('sentiment_data', {}),
-        'mlPrediction': query.get('ml_prediction', {}),
-        'riskFlags': query.get('risk_flags', {})
+def fetch_query_sources(company_name, drhp_url, deadline_seconds=None, on_source=None):
+    if deadline_seconds is None:
+        deadline_seconds = QUERY_DEADLINE_SECONDS
+    
+    calls = {
+        'reddit': (refresh_reddit_sentiment, company_name),
+        'news': (refresh_news_sentiment, company_name)
+    }
+    if drhp_url:
+        calls['drhp'] = (get_drhp_data, drhp_url)
+    
+    start = time.perf_counter()
+    futures = {name: _query_source_pools[name].submit(_timed_call, *call) for name, call in calls.items()}
+    names = {future: name for name, future in futures.items()}
+    try:
+        for future in as_completed(names, timeout=deadline_seconds):
+            if on_source is not None:
+                value, error, _ = future.result()
+                on_source(names[future], value, error)
+    except FutureTimeoutError:
+        pass
+    
+    # Sources still running at the deadline are left to finish in the
+    # background; a slow DRHP still lands in the DRHP cache for next time.
+    values = {}
+    sources = {} if drhp_url else {'drhp': {'status': 'skipped', 'elapsedMs': 0}}
+    for name, future in futures.items():
+        if not future.done():
+            sources[name] = {'status': 'timeout', 'elapsedMs': round((time.perf_counter() - start) * 1000)}
+            continue
+        value, error, elapsed = future.result()
+        sources[name] = {'status': 'ok' if error is None else 'error', 'elapsedMs': round(elapsed * 1000)}
+        if error is None:
+            values[name] = value
+    
+    # get_drhp_data returns None when the download failed and nothing was
+    # cached, and an error dict when the document hit a limit.
+    if 'drhp' in values:
+        drhp = values['drhp']
+        if not drhp or drhp.get('error'):
+            sources['drhp']['status'] = 'error'
+            sources['drhp']['error'] = drhp['error'] if drhp else 'download_failed'
+    return values, sources
+
+def _drhp_fields(drhp):
+    if drhp and not drhp.get('error'):
+        return {
+            'ofsRatio': drhp.get('ofsRatio', 0.5),
+            'freshIssue': drhp.get('freshIssue', 0),
+            'totalIssueSize': drhp.get('totalIssueSize', 0),
+            'extractedAt': datetime.now().isoformat(),
+            'pdfSource': drhp.get('pdfSource'),
+            'pagesParsed': drhp.get('pagesParsed')
+        }
+    
+    drhp_data = {
+        'ofsRatio': 0.5,
+        'freshIssue': 0,
+        'totalIssueSize': 0,
+        'extractedAt': datetime.now().isoformat(),
+        'pdfSource': None
+    }
+    if drhp:
+        drhp_data['pdfSource'] = drhp.get('pdfSource')
+        drhp_data['error'] = drhp['error']
+    return drhp_data
+
+def _sentiment_fields(company_name, values):
+    # A source that missed the deadline still contributes its last aggregate.
+    reddit = values.get('reddit') or sentiment_snapshot(company_name, 'reddit')
+    news = values.get('news') or sentiment_snapshot(company_name, 'news')
+    sentiment = combine_sentiment(reddit, news)
+    
+    return {
+        'vaderScore': round(sentiment['vaderScore'], 4),
+        'redditMentions': sentiment['redditMentions'],
+        'newsHeadlines': sentiment['newsHeadlines'],
+        'newRedditPosts': sentiment['newRedditPosts'],
+        'newNewsArticles': sentiment['newNewsArticles'],
+        'scrapedAt': datetime.now().isoformat()
+    }
+
+def build_query_data(company_name, symbol, sector, drhp_url, on_event=None):
+    query_data = {
+        'company_name': company_name,
+        'symbol': symbol,
+        'sector': sector,
+        'drhp_data': {},
+        'sentiment_data': {},
+        'ml_prediction': {},
+        'risk_flags': {}
+    }
+    
+    def emit(event, payload):
+        if on_event is not None:
+            on_event(event, payload)
+    
+    # Each stage is reported as soon as its inputs are in, so a streaming
+    # caller can show sentiment while the DRHP is still being parsed.
+    finished = {}
+    
+    def on_source(name, value, error):
+        finished[name] = value if error is None else None
+        if name == 'drhp':
+            query_data['drhp_data'] = _drhp_fields(finished['drhp'])
+            emit('drhp', {'drhpData': query_data['drhp_data']})
+        elif 'reddit' in finished and 'news' in finished and not query_data['sentiment_data']:
+            query_data['sentiment_data'] = _sentiment_fields(company_name, finished)
+            emit('sentiment', {'sentimentData': query_data['sentiment_data']})
+    
+    values, sources = fetch_query_sources(company_name, drhp_url, on_source=on_source)
+    
+    # Stages whose sources were skipped or timed out fall back here.
+    if not query_data['sentiment_data']:
+        query_data['sentiment_data'] = _sentiment_fields(company_name, values)
+        emit('sentiment', {'sentimentData': query_data['sentiment_data']})
+    if not query_data['drhp_data']:
+        query_data['drhp_data'] = _drhp_fields(values.get('drhp'))
+        emit('drhp', {'drhpData': query_data['drhp_data']})
+    
+    ml_input = json.dumps({
+        'issueSize': query_data['drhp_data'].get('totalIssueSize', 0),
+        'qibSubscription': 1.0,
+        'hniSubscription': 1.0,
+        'retailSubscription': 1.0,
+        'peRatio': 20.0,
+        'ofsPercentage': query_data['drhp_data'].get('ofsRatio', 0.5),
+        'gmpListingDay': query_data['sentiment_data'].get('vaderScore', 0)
     })
+    
+    ml = predict_ipo_success(ml_input)
+    query_data['ml_prediction'] = {
+        'successProbability': ml.get('probability', 0.5),
+        'riskScore': ml.get('riskScore', 0.5),
+        'predictedAt': datetime.now().isoformat()
+    }
+    emit('prediction', {'mlPrediction': query_data['ml_prediction']})
+    
+    avg = sector_averages.get(sector)
+    if avg:
+        drhp_data = query_data.get('drhp_data', {})
+        sentiment_data = query_data.get('sentiment_data', {})
+        if drhp_data.get('ofsRatio') is not None:
+            query_data['risk_flags']['highOFSRatio'] = drhp_data['ofsRatio'] > avg['average_ofs_ratio']
+        if sentiment_data.get('vaderScore') is not None:
+            query_data['risk_flags']['highHypeScore'] = sentiment_data['vaderScore'] > avg['average_sentiment_score']
+        query_data['risk_flags']['exceedsSectorAverage'] = (
+            query_data['risk_flags'].get('highOFSRatio', False) and
+            query_data['risk_flags'].get('highHypeScore', False)
+        )
+    emit('risk_flags', {'riskFlags': query_data['risk_flags']})
+    
+    return query_data, sources
+
+@app.route('/api/ipo/predict/batch', methods=['POST'])
+def predict_batch():
+    data = request.get_json(silent=True)
+    records = data.get('records') if isinstance(data, dict) else data
+    
+    if not isinstance(records, list):
+        return jsonify({'error': 'A list of records is required'}), 400
+    if len(records) > BATCH_PREDICT_MAX_RECORDS:
+        return jsonify({'error': f'At most {BATCH_PREDICT_MAX_RECORDS} records per batch'}), 413
+    
+    try:
+        return jsonify(predict_ipo_success_batch(records))
+    except Exception as e:
+        return jsonify({'error': 'Failed to score batch'}), 500
 
 @app.route('/api/ipo/queries', methods=['GET'])
 def get_queries():
@@ -195,12 +500,49 @@ def format_query_dict(query):
 def get_sector_averages():
     if not supabase:
         return jsonify([])
-    try:
-        result = supabase.table('sector_averages').select('*').execute()
-        return jsonify(result.data if result.data else [])
-    except Exception as e:
+    rows, etag = sector_averages.snapshot()
+    if rows is None:
         return jsonify({'error': 'Failed to fetch sector averages'}), 500
+    
+    # no-cache still lets the browser keep the body; it revalidates with
+    # If-None-Match and gets a 304 while the table is unchanged.
+    response = jsonify(rows)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/ipo/sector-averages/invalidate', methods=['POST'])
+def invalidate_sector_averages():
+    if not sector_averages.invalidate():
+        return jsonify({'error': 'Failed to reload sector averages'}), 502
+    rows, etag = sector_averages.snapshot()
+    return jsonify({'sectors': len(rows), 'etag': etag})
+
+def start_background_services():
+    refresh_scheduler.start()
+
+def init_worker():
+    # Called in each server worker after fork. The client made while
+    # preloading holds pooled connections that belong to the parent.
+    global supabase
+    init_app_state()
+    supabase = _connect_supabase()
+    start_background_services()
+
+def shutdown_worker():
+    # Lets queued async jobs finish within the server's graceful timeout
+    # and reaps the extraction and scoring subprocesses.
+    refresh_scheduler.stop(wait=False)
+    job_queue.shutdown(wait=True)
+    shutdown_worker_pool()
+    shutdown_sentiment_pool()
 
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
-    app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
+    debug = os.getenv('FLASK_DEBUG', '1') != '0'
+    preload_app_state()
+    # With the reloader on, only the child process that serves requests
+    # should run background work.
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import threading
+import multiprocessing
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from synthetic_drhp import make_drhp
+
+CORPUS_SIZES = [10, 100, 600]
+SECTION_POSITIONS = [0.1, 0.5, 0.9]
+LAYOUTS = ['plain', 'outline', 'toc']
+UNITS = ['crore', 'lakh']
+ACCURACY_FIELDS = ['freshIssue', 'totalIssueSize', 'ofsRatio']
+
+def build_corpus(corpus_dir, sizes):
+    documents = []
+    for n_pages in sizes:
+        for i, position in enumerate(SECTION_POSITIONS):
+            layout = LAYOUTS[i % len(LAYOUTS)]
+            unit = UNITS[(i + n_pages) % len(UNITS)]
+            section_page = min(max(int(n_pages * position), 2), n_pages - 1)
+            name = f'drhp_{n_pages}p_{int(position * 100)}pct_{layout}_{unit}.pdf'
+            path = os.path.join(corpus_dir, name)
+            truth = make_drhp(
+                path,
+                n_pages,
+                section_page,
+                fresh_issue=250.0 * (i + 1) + 0.5,
+                ofs_amount=400.0 * (i + 1),
+                unit=unit,
+                seed=n_pages + i,
+                layout=layout
+            )
+            documents.append({
+                'name': name,
+                'path': path,
+                'pages': n_pages,
+                'sectionPage': section_page,
+                'layout': layout,
+                'unit': unit,
+                'bytes': os.path.getsize(path),
+                'truth': truth
+            })
+    return documents
+
+def _peak_rss_mb(who=None):
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes everywhere else.
+    return rss / 1024 / 1024 if sys.platform == 'darwin' else rss / 1024
+
+def _run_mode(pdf_path, mode, workers):
+    from module_b import extract_drhp_data, shutdown_page_pool
+    
+    start = time.perf_counter()
+    if mode == 'serial':
+        result = extract_drhp_data(pdf_path, workers=1, locate=False)
+    elif mode == 'located':
+        result = extract_drhp_data(pdf_path, workers=1, locate=True)
+    else:
+        result = extract_drhp_data(pdf_path, workers=workers, locate=False)
+    elapsed = time.perf_counter() - start
+    # Page workers only show up in RUSAGE_CHILDREN once they have been
+    # reaped, which the shutdown waits for.
+    shutdown_page_pool()
+    import resource
+    return elapsed, result, _peak_rss_mb(), _peak_rss_mb(resource.RUSAGE_CHILDREN)
+
+def run_isolated(fn, *args):
+    # A fresh interpreter per measurement keeps ru_maxrss scoped to one
+    # document and one mode instead of the high-water mark of the whole run.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(fn, *args).result()
+
+def check_accuracy(result, truth):
+    return {
+        field: math.isclose(result.get(field, 0), truth[field], rel_tol=1e-9, abs_tol=1e-9)
+        for field in ACCURACY_FIELDS
+    }
+
+def _quiet_handler(directory):
+    class Handler(SimpleHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+    return partial(Handler, directory=directory)
+
+def _download(url):
+    from module_b import download_pdf
+    
+    start = time.perf_counter()
+    path = download_pdf(url)
+    elapsed = time.perf_counter() - start
+    if path:
+        os.unlink(path)
+    return elapsed, path is not None
+
+def bench_downloads(documents, corpus_dir, repeats):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _quiet_handler(corpus_dir))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    rows = []
+    try:
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+        for document in documents:
+            url = f"{base_url}/{document['name']}"
+            timings = []
+            ok = True
+            for _ in range(repeats):
+                elapsed, fetched = _download(url)
+                timings.append(elapsed)
+                ok = ok and fetched
+            best = min(timings)
+            rows.append({
+                'document': document['name'],
+                'bytes': document['bytes'],
+                'seconds': best,
+                'mbPerSecond': document['bytes'] / best / 1e6,
+                'ok': ok
+            })
+    finally:
+        server.shutdown()
+        server.server_close()
+    return rows
+
+def bench_extraction(documents, modes, workers):
+    rows = []
+    for document in documents:
+        for mode in modes:
+            elapsed, result, peak_rss, worker_peak_rss = run_isolated(_run_mode, document['path'], mode, workers)
+            accuracy = check_accuracy(result, document['truth'])
+            rows.append({
+                'document': document['name'],
+                'pages': document['pages'],
+                'layout': document['layout'],
+                'mode': mode,
+                'workers': workers if mode == 'parallel' else 1,
+                'seconds': elapsed,
+                'pagesParsed': result.get('pagesParsed'),
+                'pagesPerSecond': (result.get('pagesParsed') or 0) / elapsed,
+                'peakRssMb': peak_rss,
+                'workerPeakRssMb': worker_peak_rss,
+                'locator': result.get('locator'),
+                'accuracy': accuracy,
+                'correct': all(accuracy.values())
+            })
+    return rows
+
+def print_report(download_rows, extraction_rows):
+    print('download_pdf (local HTTP)')
+    for row in download_rows:
+        print(f"  {row['document']:44s} {row['bytes'] / 1e6:6.2f} MB  {row['seconds'] * 1000:8.1f} ms  {row['mbPerSecond']:7.1f} MB/s  ok={row['ok']}")
+    
+    print('extract_drhp_data')
+    for row in extraction_rows:
+        print(
+            f"  {row['document']:44s} {row['mode']:8s} {row['seconds']:7.2f}s  "
+            f"{row['pagesPerSecond']:7.1f} pages parsed/s  parsed={row['pagesParsed']:4d}  "
+            f"locator={row['locator']:7s}  rss={row['peakRssMb']:6.1f} MB  worker rss={row['workerPeakRssMb']:6.1f} MB  "
+            f"correct={row['correct']}"
+        )
+    
+    print('summary')
+    for mode in sorted({row['mode'] for row in extraction_rows}):
+        mode_rows = [row for row in extraction_rows if row['mode'] == mode]
+        pages = sum(row['pagesParsed'] or 0 for row in mode_rows)
+        seconds = sum(row['seconds'] for row in mode_rows)
+        correct = sum(row['correct'] for row in mode_rows)
+        peak = max(row['peakRssMb'] for row in mode_rows)
+        worker_peak = max(row['workerPeakRssMb'] for row in mode_rows)
+        print(f"  {mode:8s} {pages / seconds:7.1f} pages parsed/s  peak rss={peak:6.1f} MB  worker rss={worker_peak:6.1f} MB  accuracy={correct}/{len(mode_rows)}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark DRHP download and extraction on a synthetic corpus')
+    parser.add_argument('--sizes', type=int, nargs='+', default=CORPUS_SIZES, help='page counts to generate')
+    parser.add_argument('--modes', nargs='+', default=['serial', 'located', 'parallel'], choices=['serial', 'located', 'parallel'])
+    parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 4), help='workers for the parallel mode')
+    parser.add_argument('--download-repeats', type=int, default=3)
+    parser.add_argument('--json', dest='json_path', help='also write the raw measurements to this file')
+    args = parser.parse_args(argv)
+    
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        documents = build_corpus(corpus_dir, args.sizes)
+        print(f"Synthetic corpus: {len(documents)} documents, {sum(d['pages'] for d in documents)} pages")
+        
+        download_rows = bench_downloads(documents, corpus_dir, args.download_repeats)
+        extraction_rows = bench_extraction(documents, args.modes, args.workers)
+    
+    print_report(download_rows, extraction_rows)
+    
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'downloads': download_rows, 'extraction': extraction_rows}, f, indent=2)
+    
+    return 0 if all(row['correct'] for row in extraction_rows) else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
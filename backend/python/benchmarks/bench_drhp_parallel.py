@@ -0,0 +1,37 @@
+import os
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from module_b import extract_drhp_data, extract_drhp_data_parallel, shutdown_page_pool
+from synthetic_drhp import make_drhp
+
+def main():
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = os.path.join(tmp_dir, 'synthetic_drhp.pdf')
+        # Put the section near the end so every mode has to parse most pages.
+        truth = make_drhp(pdf_path, n_pages, section_page=n_pages - 10)
+        print(f"Synthetic DRHP: {n_pages} pages, {os.path.getsize(pdf_path) / 1e6:.1f} MB")
+        
+        start = time.perf_counter()
+        serial = extract_drhp_data(pdf_path, workers=1, locate=False)
+        serial_time = time.perf_counter() - start
+        print(f"  serial          {serial_time:8.2f}s  {n_pages / serial_time:7.1f} pages/s  correct={serial['freshIssue'] == truth['freshIssue']}")
+        
+        workers = 2
+        while workers <= max_workers:
+            start = time.perf_counter()
+            result = extract_drhp_data_parallel(pdf_path, workers=workers)
+            elapsed = time.perf_counter() - start
+            print(f"  {workers:2d} workers      {elapsed:8.2f}s  {n_pages / elapsed:7.1f} pages/s  speedup={serial_time / elapsed:4.2f}x  correct={result['freshIssue'] == truth['freshIssue']}")
+            workers *= 2
+        
+        shutdown_page_pool()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import sys
+import time
+import pickle
+import numpy as np
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from forest_eval import compile_forest
+import module_a
+
+def percentile_ms(samples, q):
+    return float(np.percentile(samples, q)) * 1000
+
+def time_calls(fn, rows, repeat):
+    samples = []
+    for i in range(repeat):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        fn(row)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def random_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    low = [0, 0, 0, 0, 0, 0, -50]
+    high = [50000, 150, 150, 50, 100, 1, 100]
+    return rng.uniform(low, high, (n, len(module_a.FEATURE_FIELDS)))
+
+def main():
+    model_file = Path(sys.argv[1]) if len(sys.argv) > 1 else module_a.model_path
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    
+    with open(model_file, 'rb') as f:
+        model = pickle.load(f)
+    forest = compile_forest(model)
+    
+    X = random_rows(5000)
+    sklearn_proba = model.predict_proba(X)
+    flat_proba = forest.predict_proba(X)
+    print(f"Probabilities identical to sklearn: {np.array_equal(sklearn_proba, flat_proba)}")
+    print(f"Max abs difference: {np.abs(sklearn_proba - flat_proba).max():.3e}")
+    
+    rows = [X[i:i + 1] for i in range(200)]
+    results = {
+        'sklearn predict_proba': time_calls(model.predict_proba, rows, repeat),
+        'flat forest predict_proba': time_calls(forest.predict_proba, rows, repeat)
+    }
+    
+    print(f"\nSingle-row latency over {repeat} calls:")
+    for name, samples in results.items():
+        print(f"  {name:28s} p50={percentile_ms(samples, 50):8.3f}ms  p99={percentile_ms(samples, 99):8.3f}ms")
+    
+    print(f"\nBatch of {len(X)} rows:")
+    for name, fn in [('sklearn predict_proba', model.predict_proba), ('flat forest predict_proba', forest.predict_proba)]:
+        samples = time_calls(lambda _: fn(X), [None], 20)
+        print(f"  {name:28s} p50={percentile_ms(samples, 50):8.3f}ms  rows/sec={len(X) / np.median(samples):,.0f}")
+
+if __name__ == '__main__':
+    main()
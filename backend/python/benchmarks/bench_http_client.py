@@ -0,0 +1,103 @@
+import sys
+import time
+import argparse
+import threading
+import requests
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import http_client
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 so the server keeps connections open between requests, and
+    # no Nagle so the separate header and body writes are not held back
+    # waiting for a delayed ACK on the reused connection.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    failures = {}
+    failures_lock = threading.Lock()
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, body=b'{}', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _fail_first(self, times):
+        with self.failures_lock:
+            seen = self.failures.get(self.path, 0)
+            self.failures[self.path] = seen + 1
+        return seen < times
+    
+    def do_GET(self):
+        if self.path.startswith('/flaky'):
+            if self._fail_first(2):
+                return self._send(503)
+        elif self.path.startswith('/limited'):
+            if self._fail_first(1):
+                return self._send(429, headers={'Retry-After': '1'})
+        self._send(200, b'{"ok": true}')
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Exercise the shared HTTP client against a local stand-in server')
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--rate', type=float, default=20.0, help='per-host rate for the throttling run')
+    args = parser.parse_args(argv)
+    
+    server, base_url = start_server()
+    host = '127.0.0.1'
+    # Lift the default limit for the throughput runs.
+    http_client.HOST_RATE_LIMITS[host] = (1e6, 1000000)
+    ok = True
+    try:
+        bare = timed(lambda: [requests.get(f'{base_url}/ok', timeout=5).json() for _ in range(args.requests)])
+        pooled = timed(lambda: [http_client.get(f'{base_url}/ok').json() for _ in range(args.requests)])
+        pool = http_client.http_client_stats()['pools'].get(f'http://{host}:{server.server_address[1]}', {})
+        print(f"bare requests.get   {bare:6.2f}s  {args.requests / bare:7.0f} req/s")
+        print(f"http_client.get     {pooled:6.2f}s  {args.requests / pooled:7.0f} req/s  "
+              f"connections={pool.get('connectionsOpened')} requests={pool.get('requests')} reuse={pool.get('reuseRatio', 0):.3f}")
+        ok = ok and pool.get('connectionsOpened') == 1
+        
+        retry_start = http_client.http_client_stats()['hosts'][host]['retries']
+        flaky = http_client.get(f'{base_url}/flaky')
+        limited_time = timed(lambda: http_client.get(f'{base_url}/limited').raise_for_status())
+        retries = http_client.http_client_stats()['hosts'][host]['retries'] - retry_start
+        print(f"retries             flaky={flaky.status_code}  429 honoured Retry-After in {limited_time:.2f}s  retries={retries}")
+        ok = ok and flaky.status_code == 200 and limited_time >= 1.0 and retries == 3
+        
+        burst = 5
+        http_client.HOST_RATE_LIMITS['localhost'] = (args.rate, burst)
+        throttled_url = f'http://localhost:{server.server_address[1]}/ok'
+        n_throttled = int(args.rate * 2)
+        elapsed = timed(lambda: [http_client.get(throttled_url) for _ in range(n_throttled)])
+        expected = (n_throttled - burst) / args.rate
+        stats = http_client.http_client_stats()['hosts']['localhost']
+        print(f"throttled {args.rate:g}/s     {elapsed:6.2f}s for {n_throttled} requests (expected >= {expected:.2f}s)  "
+              f"throttled={stats['throttled']} wait={stats['throttleWaitSeconds']}s")
+        ok = ok and elapsed >= expected * 0.95
+    finally:
+        server.shutdown()
+        server.server_close()
+    
+    print('ok' if ok else 'FAILED')
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
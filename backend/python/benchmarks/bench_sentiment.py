@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+from module_c import score_texts, preload_sentiment_analyzer, shutdown_sentiment_pool, clear_sentiment_cache, sentiment_cache_stats
+
+WORDS = (
+    'ipo listing gains subscription grey market premium retail qib hni allotment '
+    'valuation expensive cheap strong weak bullish bearish great terrible avoid apply '
+    'good bad profit loss growth risky solid overpriced undervalued love hate'
+).split()
+
+def make_texts(n_texts, seed=0):
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n_texts):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(8, 60))]
+        if rng.random() < 0.2:
+            words.append(rng.choice(['!!!', ':)', ':(', 'LOL', 'not good']))
+        texts.append(' '.join(words))
+    return texts
+
+def legacy_score(texts):
+    # The old calculate_sentiment_score: a fresh analyzer on every call.
+    analyzer = SentimentIntensityAnalyzer()
+    scores = []
+    for text in texts:
+        if text and text.strip():
+            scores.append(analyzer.polarity_scores(text)['compound'])
+    return sum(scores) / len(scores) if scores else 0.0
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark VADER sentiment scoring')
+    parser.add_argument('--query-texts', type=int, default=150, help='texts per query, as scraped by query_ipo')
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--corpus', type=int, default=50000, help='texts in the large-corpus run')
+    parser.add_argument('--workers', type=int, default=min(os.cpu_count() or 1, 4))
+    args = parser.parse_args(argv)
+    
+    queries = [make_texts(args.query_texts, seed=i) for i in range(args.queries)]
+    n_query_texts = args.query_texts * args.queries
+    
+    legacy_time, legacy_means = timed(lambda: [legacy_score(texts) for texts in queries])
+    print(f"per-query, new analyzer   {legacy_time:7.2f}s  {n_query_texts / legacy_time:9.0f} texts/s")
+    
+    preload_time, _ = timed(preload_sentiment_analyzer)
+    shared_time, shared = timed(lambda: [score_texts(texts, workers=1) for texts in queries])
+    same = all(abs(a - b['mean']) < 1e-12 for a, b in zip(legacy_means, shared))
+    print(f"per-query, shared         {shared_time:7.2f}s  {n_query_texts / shared_time:9.0f} texts/s  "
+          f"speedup={legacy_time / shared_time:5.2f}x  preload={preload_time * 1000:.0f} ms  same={same}")
+    
+    corpus = make_texts(args.corpus, seed=1000)
+    clear_sentiment_cache()
+    serial_time, serial = timed(score_texts, corpus, workers=1)
+    print(f"corpus {args.corpus}, serial   {serial_time:7.2f}s  {args.corpus / serial_time:9.0f} texts/s")
+    
+    # A repeat query sees the same posts again; every text is a cache hit.
+    warm_time, warm = timed(score_texts, corpus, workers=1)
+    same = warm['scores'] == serial['scores']
+    print(f"corpus {args.corpus}, memoized {warm_time:7.2f}s  {args.corpus / warm_time:9.0f} texts/s  "
+          f"speedup={serial_time / warm_time:5.2f}x  hitRatio={sentiment_cache_stats()['hitRatio']:.2f}  same={same}")
+    
+    if args.workers > 1:
+        # The first call pays for starting the pool; report the warm run.
+        score_texts(corpus[:args.workers * 1000], workers=args.workers)
+        clear_sentiment_cache()
+        pooled_time, pooled = timed(score_texts, corpus, workers=args.workers)
+        same = pooled['scores'] == serial['scores']
+        print(f"corpus {args.corpus}, {args.workers} procs  {pooled_time:7.2f}s  {args.corpus / pooled_time:9.0f} texts/s  "
+              f"speedup={serial_time / pooled_time:5.2f}x  same={same}")
+        shutdown_sentiment_pool()
+
+if __name__ == '__main__':
+    main()
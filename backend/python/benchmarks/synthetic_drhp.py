@@ -0,0 +1,113 @@
+import random
+
+FILLER_WORDS = (
+    'company business operations risk factors financial statements market industry '
+    'management promoters shareholders capital equity regulatory approvals disclosure '
+    'revenue growth customers products services manufacturing subsidiaries litigation'
+).split()
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def _page_stream(lines):
+    parts = ['BT', '/F1 9 Tf', '11 TL', '40 800 Td']
+    for line in lines:
+        parts.append(f'({_escape(line)}) Tj T*')
+    parts.append('ET')
+    return '\n'.join(parts).encode('latin-1')
+
+def write_pdf(path, pages, outline=None):
+    objects = []
+    
+    def add(body):
+        objects.append(body)
+        return len(objects)
+    
+    catalog_id = add(None)
+    pages_id = add(None)
+    font_id = add(b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+    
+    page_ids = []
+    for lines in pages:
+        stream = _page_stream(lines)
+        content_id = add(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        page_id = add(None)
+        objects[page_id - 1] = (
+            f'<< /Type /Page /Parent {pages_id} 0 R /MediaBox [0 0 595 842] '
+            f'/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {content_id} 0 R >>'
+        ).encode('latin-1')
+        page_ids.append(page_id)
+    
+    kids = ' '.join(f'{page_id} 0 R' for page_id in page_ids)
+    objects[pages_id - 1] = f'<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>'.encode('latin-1')
+    
+    catalog = f'<< /Type /Catalog /Pages {pages_id} 0 R'
+    if outline:
+        outlines_id = add(None)
+        item_ids = [add(None) for _ in outline]
+        for i, (title, page_index) in enumerate(outline):
+            entry = f'<< /Title ({_escape(title)}) /Parent {outlines_id} 0 R /Dest [{page_ids[page_index]} 0 R /XYZ 0 842 0]'
+            if i > 0:
+                entry += f' /Prev {item_ids[i - 1]} 0 R'
+            if i < len(item_ids) - 1:
+                entry += f' /Next {item_ids[i + 1]} 0 R'
+            objects[item_ids[i] - 1] = (entry + ' >>').encode('latin-1')
+        objects[outlines_id - 1] = (
+            f'<< /Type /Outlines /First {item_ids[0]} 0 R /Last {item_ids[-1]} 0 R /Count {len(item_ids)} >>'
+        ).encode('latin-1')
+        catalog += f' /Outlines {outlines_id} 0 R'
+    objects[catalog_id - 1] = (catalog + ' >>').encode('latin-1')
+    
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref_offset = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, catalog_id, xref_offset)
+    
+    with open(path, 'wb') as f:
+        f.write(out)
+
+def filler_line(rng, words=12):
+    return ' '.join(rng.choice(FILLER_WORDS) for _ in range(words))
+
+SECTION_TITLES = ['Definitions and Abbreviations', 'Risk Factors', 'Objects of the Issue', 'Basis for Issue Price', 'Financial Information']
+
+def _section_pages(n_pages, section_page):
+    # Spread the other sections around the objects section so both the
+    # outline and the printed TOC have neighbours to bound it with.
+    before = [max(section_page * i // 3, 2) for i in (1, 2)]
+    after = [min(section_page + 3, n_pages - 1), min(section_page + 6, n_pages - 1)]
+    return list(zip(SECTION_TITLES, before + [section_page] + after))
+
+def make_drhp(path, n_pages, section_page, fresh_issue=1200.5, ofs_amount=800.0, unit='crore', lines_per_page=40, seed=0, layout='plain'):
+    rng = random.Random(seed)
+    pages = [[filler_line(rng) for _ in range(lines_per_page)] for _ in range(n_pages)]
+    sections = _section_pages(n_pages, section_page)
+    
+    if layout == 'toc':
+        pages[1][:len(sections) + 1] = ['TABLE OF CONTENTS'] + [
+            f"{title.upper()} {'.' * 20} {page + 1}" for title, page in sections
+        ]
+    
+    total_issue = fresh_issue + ofs_amount
+    pages[section_page][5:11] = [
+        'OBJECTS OF THE ISSUE',
+        f'The Offer comprises a Fresh Issue of equity shares aggregating up to Rs. {fresh_issue:,.2f} {unit}',
+        'by our Company and',
+        f'an Offer for Sale aggregating up to Rs. {ofs_amount:,.2f} {unit} by the Selling Shareholders.',
+        'The details of the Total Issue size are set out below.',
+        f'Total Issue Size: Rs. {total_issue:,.2f} {unit}'
+    ]
+    write_pdf(path, pages, outline=sections if layout == 'outline' else None)
+    
+    scale = 0.01 if unit == 'lakh' else 1
+    return {
+        'freshIssue': fresh_issue * scale,
+        'totalIssueSize': total_issue * scale,
+        'ofsRatio': ofs_amount / total_issue
+    }
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import http_client
+from contextlib import contextmanager
+from pathlib import Path
+from module_b import DrhpLimitError, iter_limited_content
+from drhp_worker import run_drhp_extraction
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+script_dir = Path(__file__).parent
+
+DRHP_CACHE_DIR = Path(os.getenv('DRHP_CACHE_DIR', script_dir / 'drhp_cache'))
+DRHP_CACHE_MAX_BYTES = int(os.getenv('DRHP_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+_index_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    'hits': 0,
+    'revalidated': 0,
+    'misses': 0,
+    'staleServed': 0,
+    'evictions': 0
+}
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+def _blob_path(sha256):
+    return DRHP_CACHE_DIR / 'blobs' / sha256[:2] / f'{sha256}.pdf'
+
+def _result_path(sha256):
+    return DRHP_CACHE_DIR / 'results' / f'{sha256}.json'
+
+def _index_path():
+    return DRHP_CACHE_DIR / 'index.json'
+
+@contextmanager
+def _index_locked():
+    # index.json is rewritten by every server process sharing the cache
+    # directory; the file lock keeps their read-modify-writes (and the
+    # eviction that runs inside them) from overwriting each other.
+    with _index_lock:
+        if fcntl is None:
+            yield
+            return
+        DRHP_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(DRHP_CACHE_DIR / 'index.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def _load_index():
+    try:
+        with open(_index_path()) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    index.setdefault('urls', {})
+    index.setdefault('blobs', {})
+    return index
+
+def _write_json(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+def _read_result(sha256):
+    try:
+        with open(_result_path(sha256)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _cached_entry(url):
+    with _index_locked():
+        entry = _load_index()['urls'].get(url)
+    if not entry or not _blob_path(entry['sha256']).exists():
+        return None
+    result = _read_result(entry['sha256'])
+    if result is None:
+        return None
+    return entry, result
+
+def _touch(sha256):
+    with _index_locked():
+        index = _load_index()
+        if sha256 in index['blobs']:
+            index['blobs'][sha256]['lastAccess'] = time.time()
+            _write_json(_index_path(), index)
+
+def _download_blob(response):
+    blob_dir = DRHP_CACHE_DIR / 'blobs'
+    blob_dir.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    
+    fd, tmp_path = tempfile.mkstemp(dir=blob_dir, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in iter_limited_content(response):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        
+        sha256 = digest.hexdigest()
+        blob_path = _blob_path(sha256)
+        if blob_path.exists():
+            os.unlink(tmp_path)
+        else:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, blob_path)
+        return sha256, size
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def _evict(index):
+    total = sum(blob['size'] for blob in index['blobs'].values())
+    by_age = sorted(index['blobs'].items(), key=lambda item: item[1]['lastAccess'])
+    
+    for sha256, blob in by_age:
+        if total <= DRHP_CACHE_MAX_BYTES:
+            break
+        for path in (_blob_path(sha256), _result_path(sha256)):
+            if path.exists():
+                os.unlink(path)
+        del index['blobs'][sha256]
+        index['urls'] = {url: entry for url, entry in index['urls'].items() if entry['sha256'] != sha256}
+        total -= blob['size']
+        _count('evictions')
+
+def _with_source(result, url, status):
+    result = dict(result)
+    result['pdfSource'] = url
+    result['cacheStatus'] = status
+    return result
+
+def get_drhp_data(url):
+    if not url or url.strip() == '':
+        return None
+    
+    cached = _cached_entry(url)
+    headers = {}
+    if cached:
+        entry = cached[0]
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('lastModified'):
+            headers['If-Modified-Since'] = entry['lastModified']
+    
+    try:
+        response = http_client.get(url, headers=headers, timeout=30, stream=True)
+    except Exception:
+        if cached:
+            _count('staleServed')
+            return _with_source(cached[1], url, 'stale')
+        return None
+    
+    with response:
+        if response.status_code == 304 and cached:
+            _count('revalidated')
+            _touch(cached[0]['sha256'])
+            return _with_source(cached[1], url, 'revalidated')
+        
+        try:
+            response.raise_for_status()
+            sha256, size = _download_blob(response)
+        except DrhpLimitError as e:
+            return {'error': e.code, 'message': str(e), 'pdfSource': url}
+        except Exception:
+            if cached:
+                _count('staleServed')
+                return _with_source(cached[1], url, 'stale')
+            return None
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+    
+    result = _read_result(sha256)
+    if result is None:
+        _count('misses')
+        result = run_drhp_extraction(str(_blob_path(sha256)))
+        if 'error' in result:
+            # A rejected document is not indexed, so eviction would never
+            # see its blob; drop it unless another URL already shares it.
+            with _index_locked():
+                if sha256 not in _load_index()['blobs']:
+                    _blob_path(sha256).unlink(missing_ok=True)
+            result['pdfSource'] = url
+            return result
+        _write_json(_result_path(sha256), result)
+        status = 'miss'
+    else:
+        _count('hits')
+        status = 'hit'
+    
+    with _index_locked():
+        index = _load_index()
+        index['urls'][url] = {
+            'sha256': sha256,
+            'etag': etag,
+            'lastModified': last_modified,
+            'fetchedAt': time.time()
+        }
+        index['blobs'][sha256] = {
+            'size': size,
+            'lastAccess': time.time()
+        }
+        _evict(index)
+        _write_json(_index_path(), index)
+    
+    return _with_source(result, url, status)
+
+def drhp_cache_stats():
+    with _index_locked():
+        index = _load_index()
+    with _stats_lock:
+        stats = dict(_stats)
+    return {
+        **stats,
+        'documents': len(index['blobs']),
+        'urls': len(index['urls']),
+        'bytes': sum(blob['size'] for blob in index['blobs'].values()),
+        'maxBytes': DRHP_CACHE_MAX_BYTES
+    }
@@ -0,0 +1,248 @@
+import os
+import time
+import signal
+import itertools
+import threading
+import multiprocessing
+import pdfplumber
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from module_b import DRHP_MAX_BYTES, DrhpLimitError, extract_drhp_data, record_extraction
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+DRHP_ISOLATE = os.getenv('DRHP_ISOLATE', '1') != '0'
+DRHP_POOL_SIZE = int(os.getenv('DRHP_POOL_SIZE', 2))
+DRHP_MAX_PAGES = int(os.getenv('DRHP_MAX_PAGES', 1500))
+DRHP_TIMEOUT_SECONDS = float(os.getenv('DRHP_TIMEOUT_SECONDS', 120))
+DRHP_MAX_MEMORY_MB = int(os.getenv('DRHP_MAX_MEMORY_MB', 1536))
+DRHP_TASKS_PER_WORKER = int(os.getenv('DRHP_TASKS_PER_WORKER', 20))
+
+_pool = None
+_pool_lock = threading.Lock()
+_task_ids = itertools.count()
+_start_queue = None
+_stats_lock = threading.Lock()
+_stats = {
+    'submitted': 0,
+    'completed': 0,
+    'timeout': 0,
+    'oversize': 0,
+    'too_many_pages': 0,
+    'memory': 0,
+    'failed': 0,
+    'retried': 0,
+    'poolRestarts': 0
+}
+
+def _init_worker(max_memory_mb, start_queue):
+    global _start_queue
+    _start_queue = start_queue
+    # RLIMIT_AS caps the address space, which is the closest portable stand-in
+    # for an RSS cap; allocations past it raise MemoryError inside the worker.
+    if resource is not None and max_memory_mb > 0:
+        limit = max_memory_mb * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+
+class ExtractionTimeout(BaseException):
+    # Not an Exception subclass, so the broad handlers around pdfminer calls
+    # cannot swallow it the way they would a parse error.
+    pass
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def _extract_in_worker(task_id, pdf_path, max_pages, timeout_seconds):
+    if _start_queue is not None:
+        _start_queue.put((task_id, os.getpid(), time.time()))
+    use_alarm = hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout_seconds)
+    
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+        if page_count > max_pages:
+            raise DrhpLimitError('too_many_pages', f'DRHP has {page_count} pages, limit is {max_pages}')
+        
+        result = extract_drhp_data(pdf_path, workers=1)
+    except DrhpLimitError as e:
+        return {'error': e.code, 'message': str(e), 'workerPeakRssMb': _peak_rss_mb()}
+    except ExtractionTimeout:
+        return {'error': 'timeout', 'message': 'DRHP extraction exceeded the wall-clock limit', 'workerPeakRssMb': _peak_rss_mb()}
+    except MemoryError:
+        return {'error': 'memory', 'message': 'DRHP extraction exceeded the memory limit', 'workerPeakRssMb': _peak_rss_mb()}
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    
+    result['workerPeakRssMb'] = _peak_rss_mb()
+    return result
+
+class _WedgedWorker(Exception):
+    pass
+
+class _WorkerPool:
+    def __init__(self):
+        ctx = multiprocessing.get_context('spawn')
+        # Workers report (task id, pid, start time) here when they pick a
+        # task up, so deadlines run from the start of the work rather than
+        # from submission, and a wedged worker can be killed on its own.
+        self.start_queue = ctx.SimpleQueue()
+        self.executor = ProcessPoolExecutor(
+            max_workers=DRHP_POOL_SIZE,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(DRHP_MAX_MEMORY_MB, self.start_queue),
+            max_tasks_per_child=DRHP_TASKS_PER_WORKER
+        )
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.started = {}
+        threading.Thread(target=self._read_starts, name='drhp-worker-starts', daemon=True).start()
+    
+    def _read_starts(self):
+        while True:
+            try:
+                item = self.start_queue.get()
+            except (EOFError, OSError):
+                return
+            if item is None:
+                return
+            task_id, pid, started_at = item
+            with self.lock:
+                if task_id in self.pending:
+                    self.started[task_id] = (pid, started_at)
+    
+    def run(self, *args):
+        task_id = next(_task_ids)
+        with self.lock:
+            self.pending.add(task_id)
+        try:
+            future = self.executor.submit(_extract_in_worker, task_id, *args)
+            while True:
+                with self.lock:
+                    started = self.started.get(task_id)
+                wait_seconds = 1.0
+                if started is not None:
+                    # The worker enforces the limit itself; the extra grace
+                    # only catches one wedged in native code that ignores SIGALRM.
+                    remaining = started[1] + DRHP_TIMEOUT_SECONDS + 10 - time.time()
+                    if remaining <= 0:
+                        raise _WedgedWorker(started[0])
+                    wait_seconds = min(wait_seconds, remaining)
+                try:
+                    return future.result(timeout=wait_seconds)
+                except FutureTimeoutError:
+                    continue
+        finally:
+            with self.lock:
+                self.pending.discard(task_id)
+                self.started.pop(task_id, None)
+    
+    def close(self, wait=False):
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+        self.start_queue.put(None)
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _WorkerPool()
+        return _pool
+
+def _discard_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    # A broken executor terminates its remaining workers itself.
+    pool.close()
+    with _stats_lock:
+        _stats['poolRestarts'] += 1
+
+def shutdown_worker_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.close(wait=True)
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+def run_drhp_extraction(pdf_path):
+    _count('submitted')
+    try:
+        size = os.path.getsize(pdf_path)
+    except OSError:
+        _count('failed')
+        return {'error': 'failed', 'message': 'DRHP file is missing'}
+    if size > DRHP_MAX_BYTES:
+        _count('oversize')
+        return {'error': 'oversize', 'message': f'DRHP is {size} bytes, limit is {DRHP_MAX_BYTES}'}
+    
+    if not DRHP_ISOLATE:
+        result = extract_drhp_data(pdf_path)
+        _count('completed')
+        return result
+    
+    # A worker that dies takes the whole executor down with it, failing
+    # every other task in flight; those get one more try on a fresh pool.
+    for attempt in range(2):
+        pool = _get_pool()
+        try:
+            result = pool.run(pdf_path, DRHP_MAX_PAGES, DRHP_TIMEOUT_SECONDS)
+            break
+        except _WedgedWorker as e:
+            try:
+                os.kill(e.args[0], signal.SIGKILL)
+            except OSError:
+                pass
+            _discard_pool(pool)
+            _count('timeout')
+            return {'error': 'timeout', 'message': 'DRHP extraction exceeded the wall-clock limit'}
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if attempt == 0:
+                _count('retried')
+                continue
+            _count('memory')
+            return {'error': 'memory', 'message': 'DRHP worker died, most likely out of memory'}
+        except Exception as e:
+            _count('failed')
+            return {'error': 'failed', 'message': str(e)}
+    
+    if 'error' in result:
+        _count(result['error'])
+    else:
+        _count('completed')
+        record_extraction(result)
+    return result
+
+def drhp_worker_stats():
+    with _stats_lock:
+        return {
+            **_stats,
+            'isolated': DRHP_ISOLATE,
+            'poolSize': DRHP_POOL_SIZE,
+            'maxBytes': DRHP_MAX_BYTES,
+            'maxPages': DRHP_MAX_PAGES,
+            'timeoutSeconds': DRHP_TIMEOUT_SECONDS,
+            'maxMemoryMb': DRHP_MAX_MEMORY_MB,
+            'tasksPerWorker': DRHP_TASKS_PER_WORKER
+        }
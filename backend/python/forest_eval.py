@@ -0,0 +1,182 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from datetime import datetime
+
+ARTIFACT_FORMAT_VERSION = 1
+ARTIFACT_ARRAYS = ['feature', 'threshold', 'children', 'value', 'roots', 'classes']
+ARTIFACT_KEEP_VERSIONS = 3
+
+class FlatForest:
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+    
+    def apply(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n_rows, n_features = X.shape
+        flat_X = X.ravel()
+        row_offsets = (np.arange(n_rows, dtype=np.intp) * n_features)[:, None]
+        n_nodes = len(self.feature)
+        
+        # children holds every left child followed by every right child.
+        nodes = np.broadcast_to(self.roots.astype(np.intp, copy=False), (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            x = flat_X.take(row_offsets + self.feature.take(nodes))
+            go_right = x > self.threshold.take(nodes)
+            nodes = self.children.take(nodes + go_right * n_nodes)
+        return nodes
+    
+    def predict_proba(self, X):
+        nodes = self.apply(X)
+        return self.value[nodes].sum(axis=1) / len(self.roots)
+    
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+    
+    def arrays(self):
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'children': self.children,
+            'value': self.value,
+            'roots': self.roots,
+            'classes': self.classes_
+        }
+
+def compile_forest(model):
+    features = []
+    thresholds = []
+    lefts = []
+    rights = []
+    values = []
+    roots = []
+    offset = 0
+    max_depth = 0
+    
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        node_ids = np.arange(tree.node_count, dtype=np.intp)
+        is_leaf = tree.children_left == -1
+        
+        # Leaves point back at themselves so every row can take max_depth steps.
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.intp))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold).astype(np.float64))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left).astype(np.intp) + offset)
+        rights.append(np.where(is_leaf, node_ids, tree.children_right).astype(np.intp) + offset)
+        
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+        
+        roots.append(offset)
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+    
+    return FlatForest(
+        np.concatenate(features),
+        np.concatenate(thresholds),
+        np.concatenate(lefts + rights),
+        np.concatenate(values),
+        np.array(roots, dtype=np.intp),
+        max_depth,
+        np.asarray(model.classes_)
+    )
+
+def save_artifact(forest, artifact_dir, feature_order, metrics=None):
+    artifact_dir = str(artifact_dir)
+    os.makedirs(artifact_dir, exist_ok=True)
+    
+    digest = hashlib.sha256()
+    for name, array in forest.arrays().items():
+        digest.update(np.ascontiguousarray(array).tobytes())
+    version = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{digest.hexdigest()[:12]}"
+    
+    version_dir = os.path.join(artifact_dir, version)
+    tmp_dir = os.path.join(artifact_dir, f'.{version}.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    
+    arrays = {}
+    for name, array in forest.arrays().items():
+        array = np.ascontiguousarray(array)
+        np.save(os.path.join(tmp_dir, f'{name}.npy'), array, allow_pickle=False)
+        arrays[name] = {'dtype': array.dtype.str, 'shape': list(array.shape)}
+    
+    manifest = {
+        'formatVersion': ARTIFACT_FORMAT_VERSION,
+        'modelVersion': version,
+        'createdAt': datetime.now().isoformat(),
+        'featureOrder': list(feature_order),
+        'nTrees': len(forest.roots),
+        'nNodes': len(forest.feature),
+        'maxDepth': forest.max_depth,
+        'classes': forest.classes_.tolist(),
+        'metrics': metrics or {},
+        'arrays': arrays
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    shutil.rmtree(version_dir, ignore_errors=True)
+    os.rename(tmp_dir, version_dir)
+    
+    current_tmp = os.path.join(artifact_dir, 'CURRENT.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(artifact_dir, 'CURRENT'))
+    
+    prune_artifacts(artifact_dir, keep_version=version)
+    return version
+
+def prune_artifacts(artifact_dir, keep_version=None, keep=ARTIFACT_KEEP_VERSIONS):
+    versions = sorted(
+        name for name in os.listdir(artifact_dir)
+        if name != keep_version and os.path.isfile(os.path.join(artifact_dir, name, 'manifest.json'))
+    )
+    for name in versions[:max(len(versions) - (keep - 1), 0)]:
+        shutil.rmtree(os.path.join(artifact_dir, name), ignore_errors=True)
+
+def current_artifact_version(artifact_dir):
+    with open(os.path.join(str(artifact_dir), 'CURRENT')) as f:
+        return f.read().strip()
+
+def load_artifact(artifact_dir, version=None, mmap=True):
+    if version is None:
+        version = current_artifact_version(artifact_dir)
+    version_dir = os.path.join(str(artifact_dir), version)
+    
+    with open(os.path.join(version_dir, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('formatVersion') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('formatVersion')}")
+    
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for name in ARTIFACT_ARRAYS:
+        array = np.load(os.path.join(version_dir, f'{name}.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+        expected = manifest['arrays'][name]
+        if array.dtype.str != expected['dtype'] or list(array.shape) != expected['shape']:
+            raise ValueError(f'Artifact array {name} does not match manifest')
+        arrays[name] = array
+    
+    forest = FlatForest(
+        arrays['feature'],
+        arrays['threshold'],
+        arrays['children'],
+        arrays['value'],
+        arrays['roots'],
+        manifest['maxDepth'],
+        arrays['classes']
+    )
+    return forest, manifest
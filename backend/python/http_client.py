@@ -0,0 +1,208 @@
+import os
+import time
+import random
+import threading
+import requests
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv('HTTP_TIMEOUT_SECONDS', 10))
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 16))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 3))
+HTTP_BACKOFF_SECONDS = float(os.getenv('HTTP_BACKOFF_SECONDS', 0.5))
+HTTP_BACKOFF_MAX_SECONDS = float(os.getenv('HTTP_BACKOFF_MAX_SECONDS', 10))
+HTTP_MAX_THROTTLE_SECONDS = float(os.getenv('HTTP_MAX_THROTTLE_SECONDS', 30))
+HTTP_DEFAULT_RATE = float(os.getenv('HTTP_DEFAULT_RATE', 10))
+HTTP_DEFAULT_BURST = int(os.getenv('HTTP_DEFAULT_BURST', 10))
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'IPO-Screener-Bot/1.0'
+}
+
+# Requests per second and burst size per host. Unauthenticated reddit
+# clients get a few requests per minute before 429s start.
+HOST_RATE_LIMITS = {
+    'www.reddit.com': (0.5, 5),
+    'newsapi.org': (1.0, 5)
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+RETRY_METHODS = {'GET', 'HEAD'}
+
+class HttpThrottledError(requests.RequestException):
+    pass
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self):
+        # Tokens may go negative: each caller reserves its slot and sleeps
+        # until it comes round, which keeps waiters in arrival order.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+    
+    def refund(self):
+        with self.lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+def _parse_rate_limits(value):
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        host, spec = item.split('=', 1)
+        rate, _, burst = spec.partition(':')
+        limits[host.strip().lower()] = (float(rate), int(burst or max(1, float(rate))))
+    return limits
+
+HOST_RATE_LIMITS.update(_parse_rate_limits(os.getenv('HTTP_RATE_LIMITS')))
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+_buckets = {}
+_stats_lock = threading.Lock()
+_host_stats = {}
+
+def get_session():
+    # Sessions hold sockets, so a forked worker builds its own instead of
+    # sharing the parent's connections.
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                session.headers.update(DEFAULT_HEADERS)
+                adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+                _session_pid = os.getpid()
+    return _session
+
+def _bucket(host):
+    bucket = _buckets.get(host)
+    if bucket is None:
+        with _stats_lock:
+            bucket = _buckets.get(host)
+            if bucket is None:
+                rate, burst = HOST_RATE_LIMITS.get(host, (HTTP_DEFAULT_RATE, HTTP_DEFAULT_BURST))
+                bucket = _buckets[host] = TokenBucket(rate, burst)
+    return bucket
+
+def _count(host, key, amount=1):
+    with _stats_lock:
+        stats = _host_stats.setdefault(host, {
+            'requests': 0,
+            'retries': 0,
+            'throttled': 0,
+            'throttleWaitSeconds': 0.0,
+            'errors': 0
+        })
+        stats[key] += amount
+
+def _throttle(host):
+    bucket = _bucket(host)
+    wait = bucket.reserve()
+    if wait <= 0:
+        return
+    if wait > HTTP_MAX_THROTTLE_SECONDS:
+        bucket.refund()
+        raise HttpThrottledError(f'Rate limit for {host} would delay this request by {wait:.1f}s')
+    _count(host, 'throttled')
+    _count(host, 'throttleWaitSeconds', wait)
+    time.sleep(wait)
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+def _backoff_seconds(attempt):
+    # Full jitter keeps concurrent callers from retrying in lockstep.
+    return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_SECONDS * 2 ** attempt))
+
+def request(method, url, retries=None, **kwargs):
+    method = method.upper()
+    retries = HTTP_MAX_RETRIES if retries is None else retries
+    if method not in RETRY_METHODS:
+        retries = 0
+    kwargs.setdefault('timeout', HTTP_TIMEOUT_SECONDS)
+    host = (urlsplit(url).hostname or '').lower()
+    session = get_session()
+    
+    attempt = 0
+    while True:
+        _throttle(host)
+        _count(host, 'requests')
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            _count(host, 'errors')
+            if attempt >= retries:
+                raise
+            delay = _backoff_seconds(attempt)
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            retry_after = _retry_after_seconds(response)
+            if retry_after is not None and retry_after > HTTP_BACKOFF_MAX_SECONDS:
+                return response
+            delay = max(retry_after or 0.0, _backoff_seconds(attempt))
+            response.close()
+        
+        _count(host, 'retries')
+        time.sleep(delay)
+        attempt += 1
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+def _pool_stats(session):
+    pools = {}
+    for adapter in set(session.adapters.values()):
+        manager = adapter.poolmanager
+        for key in list(manager.pools.keys()):
+            pool = manager.pools.get(key)
+            if pool is None:
+                continue
+            host = f'{pool.scheme}://{pool.host}:{pool.port}'
+            pools[host] = {
+                'connectionsOpened': pool.num_connections,
+                'requests': pool.num_requests,
+                'reuseRatio': 1 - pool.num_connections / pool.num_requests if pool.num_requests else 0.0
+            }
+    return pools
+
+def http_client_stats():
+    with _stats_lock:
+        hosts = {host: dict(stats) for host, stats in _host_stats.items()}
+    for host, stats in hosts.items():
+        rate, burst = HOST_RATE_LIMITS.get(host, (HTTP_DEFAULT_RATE, HTTP_DEFAULT_BURST))
+        stats['ratePerSecond'] = rate
+        stats['burst'] = burst
+        stats['throttleWaitSeconds'] = round(stats['throttleWaitSeconds'], 3)
+    return {
+        'hosts': hosts,
+        'pools': _pool_stats(_session) if _session is not None and _session_pid == os.getpid() else {}
+    }
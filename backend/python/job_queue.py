@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import sqlite3
+import uuid
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 4))
+JOB_MAX_QUEUED = int(os.getenv('JOB_MAX_QUEUED', 100))
+JOB_RESULT_TTL_SECONDS = float(os.getenv('JOB_RESULT_TTL_SECONDS', 3600))
+JOB_MAX_RETAINED = int(os.getenv('JOB_MAX_RETAINED', 1000))
+# Optional sqlite file shared by every server process, so a job can be
+# polled from a different worker than the one running it.
+JOB_STORE_PATH = os.getenv('JOB_STORE_PATH', '')
+
+class QueueFullError(Exception):
+    pass
+
+class JobQueue:
+    def __init__(self, workers=None, max_queued=None, result_ttl=None, max_retained=None, store_path=None):
+        self.workers = workers or JOB_WORKERS
+        self.max_queued = JOB_MAX_QUEUED if max_queued is None else max_queued
+        self.result_ttl = JOB_RESULT_TTL_SECONDS if result_ttl is None else result_ttl
+        self.max_retained = max_retained or JOB_MAX_RETAINED
+        self.store_path = JOB_STORE_PATH if store_path is None else store_path
+        
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='query-job')
+        self._jobs = OrderedDict()
+        self._db = None
+        self._db_pid = None
+        self._queued = 0
+        self._running = 0
+        self._durations = deque(maxlen=500)
+        self._waits = deque(maxlen=500)
+        self._stats = {
+            'submitted': 0,
+            'succeeded': 0,
+            'failed': 0,
+            'rejected': 0
+        }
+    
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            self._prune()
+            if self._queued >= self.max_queued:
+                self._stats['rejected'] += 1
+                raise QueueFullError(f'{self._queued} jobs are already waiting')
+            job = {
+                'jobId': uuid.uuid4().hex,
+                'status': 'queued',
+                'createdAt': time.time(),
+                'startedAt': None,
+                'finishedAt': None,
+                'result': None,
+                'error': None
+            }
+            self._jobs[job['jobId']] = job
+            self._queued += 1
+            self._stats['submitted'] += 1
+            public = self._public(job)
+            self._store(job)
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return public
+    
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            job['status'] = 'running'
+            job['startedAt'] = time.time()
+            self._waits.append(job['startedAt'] - job['createdAt'])
+            self._store(job)
+        
+        try:
+            result = fn(*args, **kwargs)
+            status, error = 'succeeded', None
+        except Exception as e:
+            result, status, error = None, 'failed', str(e) or type(e).__name__
+        
+        with self._lock:
+            self._running -= 1
+            job['status'] = status
+            job['result'] = result
+            job['error'] = error
+            job['finishedAt'] = time.time()
+            self._durations.append(job['finishedAt'] - job['startedAt'])
+            self._stats[status] += 1
+            self._store(job)
+    
+    def _prune(self):
+        # Finished jobs are kept for polling until they age out or the
+        # retention cap is hit; queued and running jobs are never dropped.
+        cutoff = time.time() - self.result_ttl
+        finished = [job_id for job_id, job in self._jobs.items() if job['finishedAt'] is not None]
+        overflow = len(self._jobs) - self.max_retained
+        for job_id in finished:
+            job = self._jobs[job_id]
+            if job['finishedAt'] < cutoff or overflow > 0:
+                del self._jobs[job_id]
+                overflow -= 1
+        
+        db = self._get_db()
+        if db is not None:
+            try:
+                db.execute('DELETE FROM jobs WHERE finished_at < ?', (cutoff,))
+                db.commit()
+            except sqlite3.Error:
+                pass
+    
+    def _get_db(self):
+        if not self.store_path:
+            return None
+        # Connections are not carried across a fork; each process opens its own.
+        if self._db is None or self._db_pid != os.getpid():
+            try:
+                db = sqlite3.connect(self.store_path, timeout=10, check_same_thread=False)
+                db.execute('CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, job TEXT NOT NULL, finished_at REAL)')
+                db.commit()
+            except sqlite3.Error:
+                return None
+            self._db, self._db_pid = db, os.getpid()
+        return self._db
+    
+    def _store(self, job):
+        db = self._get_db()
+        if db is None:
+            return
+        try:
+            db.execute(
+                'INSERT OR REPLACE INTO jobs (job_id, job, finished_at) VALUES (?, ?, ?)',
+                (job['jobId'], json.dumps(job, default=str), job['finishedAt'])
+            )
+            db.commit()
+        except sqlite3.Error:
+            pass
+    
+    def _stored(self, job_id):
+        db = self._get_db()
+        if db is None:
+            return None
+        try:
+            row = db.execute('SELECT job FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        except sqlite3.Error:
+            return None
+        return json.loads(row[0]) if row else None
+    
+    def _public(self, job):
+        public = {
+            'jobId': job['jobId'],
+            'status': job['status'],
+            'createdAt': job['createdAt'],
+            'startedAt': job['startedAt'],
+            'finishedAt': job['finishedAt']
+        }
+        if job['startedAt'] is not None:
+            public['queueWaitMs'] = round((job['startedAt'] - job['createdAt']) * 1000)
+        if job['finishedAt'] is not None:
+            public['durationMs'] = round((job['finishedAt'] - job['startedAt']) * 1000)
+        if job['status'] == 'succeeded':
+            public['result'] = job['result']
+        elif job['status'] == 'failed':
+            public['error'] = job['error']
+        return public
+    
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id) or self._stored(job_id)
+            return self._public(job) if job is not None else None
+    
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+    
+    def stats(self):
+        with self._lock:
+            durations = sorted(self._durations)
+            waits = sorted(self._waits)
+            
+            def percentile(values, q):
+                return round(values[min(int(len(values) * q), len(values) - 1)] * 1000) if values else None
+            
+            return {
+                **self._stats,
+                'queueDepth': self._queued,
+                'running': self._running,
+                'retained': len(self._jobs),
+                'workers': self.workers,
+                'maxQueued': self.max_queued,
+                'persistent': bool(self.store_path),
+                'durationMsP50': percentile(durations, 0.5),
+                'durationMsP95': percentile(durations, 0.95),
+                'queueWaitMsP50': percentile(waits, 0.5),
+                'queueWaitMsP95': percentile(waits, 0.95)
+            }
@@ -1,11 +1,20 @@
 import sys
 import json
 import pickle
+import hashlib
+import os
+import threading
+from collections import OrderedDict
 import numpy as np
 from pathlib import Path
+from forest_eval import load_artifact
 
 script_dir = Path(__file__).parent
 model_path = script_dir / 'ml_model.pkl'
+artifact_dir = script_dir / 'ml_model_artifact'
+artifact_pointer = artifact_dir / 'CURRENT'
+
+MODEL_ENGINE = os.getenv('IPO_MODEL_ENGINE', 'sklearn')
 
 def load_model():
     if model_path.exists():
@@ -13,8 +22,137 @@ def load_model():
             return pickle.load(f)
     return None
 
+FEATURE_FIELDS = [
+    ('issueSize', 0),
+    ('qibSubscription', 1.0),
+    ('hniSubscription', 1.0),
+    ('retailSubscription', 1.0),
+    ('peRatio', 20.0),
+    ('ofsPercentage', 0.5),
+    ('gmpListingDay', 0)
+]
+
+# Training-data column for each entry of FEATURE_FIELDS, in the same order.
+FEATURE_COLUMNS = [
+    'Issue_Size',
+    'QIB_Subscription',
+    'HNI_Subscription',
+    'Retail_Subscription',
+    'PE_Ratio',
+    'OFS_Percentage',
+    'GMP_Listing_Day'
+]
+
+_registry_lock = threading.Lock()
+_registry = {
+    'current': (None, None, None),
+    'stat': None
+}
+
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 4096))
+
+_prediction_cache_lock = threading.Lock()
+_prediction_cache = OrderedDict()
+_prediction_cache_stats = {
+    'hits': 0,
+    'misses': 0,
+    'evictions': 0,
+    'invalidations': 0
+}
+
+def _model_source():
+    if MODEL_ENGINE != 'sklearn' and artifact_pointer.exists():
+        return artifact_pointer
+    return model_path
+
+def _model_file_stat():
+    source = _model_source()
+    try:
+        st = source.stat()
+    except OSError:
+        return None
+    return (str(source), st.st_mtime_ns, st.st_size)
+
+def _load_model_snapshot(source):
+    if source == artifact_pointer:
+        model, manifest = load_artifact(artifact_dir, mmap=True)
+        if list(manifest['featureOrder']) != FEATURE_COLUMNS:
+            raise ValueError('Model artifact feature order does not match FEATURE_FIELDS')
+        return model, manifest['modelVersion'], manifest
+    
+    with open(source, 'rb') as f:
+        payload = f.read()
+    return pickle.loads(payload), hashlib.sha256(payload).hexdigest(), None
+
+def _current_model():
+    stat = _model_file_stat()
+    if stat is not None and stat == _registry['stat']:
+        return _registry['current']
+    
+    with _registry_lock:
+        stat = _model_file_stat()
+        if stat is None or stat == _registry['stat']:
+            return _registry['current']
+        
+        try:
+            current = _load_model_snapshot(Path(stat[0]))
+        except Exception:
+            return _registry['current']
+        
+        if current[1] != _registry['current'][1]:
+            _registry['current'] = current
+            clear_prediction_cache()
+        _registry['stat'] = stat
+        return _registry['current']
+
+def get_model():
+    return _current_model()[0]
+
+def get_model_version():
+    return _current_model()[1]
+
+def get_model_manifest():
+    return _current_model()[2]
+
+def clear_prediction_cache():
+    with _prediction_cache_lock:
+        if _prediction_cache:
+            _prediction_cache_stats['invalidations'] += 1
+        _prediction_cache.clear()
+
+def prediction_cache_stats():
+    with _prediction_cache_lock:
+        lookups = _prediction_cache_stats['hits'] + _prediction_cache_stats['misses']
+        return {
+            **_prediction_cache_stats,
+            'size': len(_prediction_cache),
+            'maxSize': PREDICTION_CACHE_SIZE,
+            'hitRatio': _prediction_cache_stats['hits'] / lookups if lookups else 0.0,
+            'modelVersion': _registry['current'][1]
+        }
+
+def _cached_prediction(key):
+    with _prediction_cache_lock:
+        result = _prediction_cache.get(key)
+        if result is None:
+            _prediction_cache_stats['misses'] += 1
+            return None
+        _prediction_cache.move_to_end(key)
+        _prediction_cache_stats['hits'] += 1
+        return dict(result)
+
+def _store_prediction(key, result):
+    if PREDICTION_CACHE_SIZE <= 0:
+        return
+    with _prediction_cache_lock:
+        _prediction_cache[key] = dict(result)
+        _prediction_cache.move_to_end(key)
+        while len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+            _prediction_cache.popitem(last=False)
+            _prediction_cache_stats['evictions'] += 1
+
 def predict_ipo_success(input_data):
-    model = load_model()
+    model, version, _ = _current_model()
     if model is None:
         return {
             "probability": 0.5,
@@ -25,31 +163,24 @@ def predict_ipo_success(input_data):
     try:
         data = json.loads(input_data)
         
-        issue_size = data.get('issueSize', 0)
-        qib_subscription = data.get('qibSubscription', 1.0)
-        hni_subscription = data.get('hniSubscription', 1.0)
-        retail_subscription = data.get('retailSubscription', 1.0)
-        pe_ratio = data.get('peRatio', 20.0)
-        ofs_percentage = data.get('ofsPercentage', 0.5)
-        gmp_listing_day = data.get('gmpListingDay', 0)
+        row = build_feature_row(data)
+        # Adding 0.0 folds -0.0 into 0.0 so equal inputs share a key.
+        key = (version,) + tuple(value + 0.0 for value in row)
+        cached = _cached_prediction(key)
+        if cached is not None:
+            return cached
         
-        features = np.array([[
-            issue_size,
-            qib_subscription,
-            hni_subscription,
-            retail_subscription,
-            pe_ratio,
-            ofs_percentage,
-            gmp_listing_day
-        ]])
+        features = np.array([row])
         
         probability = model.predict_proba(features)[0][1]
         risk_score = 1 - probability
         
-        return {
+        result = {
             "probability": float(probability),
             "riskScore": float(risk_score)
         }
+        _store_prediction(key, result)
+        return result
     except Exception as e:
         pass
     
@@ -58,6 +189,67 @@ def predict_ipo_success(input_data):
         "riskScore": 0.5
     }
 
+def build_feature_row(data):
+    if not isinstance(data, dict):
+        raise ValueError('record must be an object')
+    
+    row = []
+    for key, default in FEATURE_FIELDS:
+        value = data.get(key, default)
+        if value is None:
+            value = default
+        if isinstance(value, bool):
+            raise ValueError(f'{key} must be a number')
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{key} must be a number')
+        if not np.isfinite(value):
+            raise ValueError(f'{key} must be finite')
+        row.append(value)
+    return row
+
+def predict_ipo_success_batch(records):
+    if isinstance(records, (str, bytes)):
+        records = json.loads(records)
+    if not isinstance(records, list):
+        raise ValueError('records must be a list')
+    
+    results = [None] * len(records)
+    rows = []
+    row_indices = []
+    for i, record in enumerate(records):
+        try:
+            rows.append(build_feature_row(record))
+            row_indices.append(i)
+        except ValueError as e:
+            results[i] = {'index': i, 'error': str(e)}
+    
+    model = get_model()
+    if rows and model is None:
+        for i in row_indices:
+            results[i] = {
+                'index': i,
+                'probability': 0.5,
+                'riskScore': 0.5,
+                'error': 'Model not trained yet'
+            }
+    elif rows:
+        features = np.array(rows, dtype=np.float64)
+        probabilities = model.predict_proba(features)[:, 1]
+        for i, probability in zip(row_indices, probabilities.tolist()):
+            results[i] = {
+                'index': i,
+                'probability': probability,
+                'riskScore': 1 - probability
+            }
+    
+    return {
+        'results': results,
+        'count': len(results),
+        'errors': len(records) - len(rows)
+    }
+
 if __name__ == '__main__':
     input_data = sys.argv[1] if len(sys.argv) > 1 else '{}'
     result = predict_ipo_success(input_data)
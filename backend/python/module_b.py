@@ -1,109 +1,581 @@
 import sys
 import json
 import pdfplumber
-import requests
+import http_client
 import tempfile
 import os
+import re
+import math
+import time
+import argparse
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from pdfminer.pdftypes import PDFObjRef, resolve1
+from pdfminer.psparser import PSLiteral
 
-def download_pdf(url):
+DRHP_WORKERS = int(os.getenv('DRHP_WORKERS', 1))
+DRHP_CHUNK_PAGES = int(os.getenv('DRHP_CHUNK_PAGES', 25))
+DRHP_TOC_SCAN_PAGES = int(os.getenv('DRHP_TOC_SCAN_PAGES', 10))
+DRHP_LOCATOR_SLACK_PAGES = int(os.getenv('DRHP_LOCATOR_SLACK_PAGES', 30))
+DRHP_MAX_BYTES = int(os.getenv('DRHP_MAX_BYTES', 100 * 1024 * 1024))
+
+LOCATOR_TITLES = [
+    ('objects of the issue', 'objects of issue'),
+    ('the offer',)
+]
+TOC_ENTRY_RE = re.compile(r'^\s*(?P<title>[A-Za-z][^\n]*?)[\s\.\u2026_-]{2,}(?P<page>\d{1,4})\s*$')
+
+_extraction_stats_lock = threading.Lock()
+_extraction_stats = {
+    'documents': 0,
+    'pagesParsed': 0,
+    'pagesTotal': 0,
+    'locator': {
+        'outline': 0,
+        'toc': 0,
+        'full': 0
+    }
+}
+
+_page_pool = None
+_page_pool_workers = 0
+_page_pool_users = {}
+_page_pool_lock = threading.Lock()
+
+class DrhpLimitError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+def iter_limited_content(response, max_bytes=None, chunk_size=65536):
+    max_bytes = max_bytes or DRHP_MAX_BYTES
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise DrhpLimitError('oversize', f'DRHP is {int(content_length)} bytes, limit is {max_bytes}')
+    
+    received = 0
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        received += len(chunk)
+        if received > max_bytes:
+            raise DrhpLimitError('oversize', f'DRHP exceeds the {max_bytes} byte limit')
+        yield chunk
+
+def download_pdf(url, max_bytes=None):
     if not url or url.strip() == '':
         return None
     
+    temp_file = None
     try:
-        response = requests.get(url, timeout=30, stream=True)
-        response.raise_for_status()
-        
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        for chunk in response.iter_content(chunk_size=8192):
-            temp_file.write(chunk)
-        temp_file.close()
+        response = http_client.get(url, timeout=30, stream=True)
+        # Closing the response returns the connection to the pool even when
+        # the body is abandoned part way, e.g. for exceeding the size cap.
+        with response:
+            response.raise_for_status()
+            
+            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+            for chunk in iter_limited_content(response, max_bytes, chunk_size=8192):
+                temp_file.write(chunk)
+            temp_file.close()
         
         return temp_file.name
     except Exception:
+        if temp_file is not None:
+            temp_file.close()
+            os.unlink(temp_file.name)
+        return None
+
+AMOUNT_WINDOW_LINES = 10
+
+KEYWORD_GROUPS = {
+    'objects of the issue': 'section',
+    'objects of issue': 'section',
+    'offer for sale': 'ofs',
+    'ofs': 'ofs',
+    'fresh issue': 'fresh',
+    'new issue': 'fresh',
+    'total issue': 'total',
+    'aggregate issue': 'total',
+    'crore': 'amount',
+    'rs.': 'amount',
+    'lakh': 'lakh'
+}
+KEYWORD_TABLE = tuple(KEYWORD_GROUPS.items())
+NUMBER_RE = re.compile(r'\d+\.?\d*')
+
+class DrhpScanner:
+    def __init__(self):
+        self.in_objects_section = False
+        self.amounts = {
+            'ofs': None,
+            'fresh': None,
+            'total': None
+        }
+        self.pending = []
+        self.lines_scanned = 0
+        self.pages_scanned = 0
+        self.page_count = 0
+        self.locator = 'full'
+    
+    @property
+    def done(self):
+        return all(value is not None for value in self.amounts.values())
+    
+    def feed(self, line):
+        return self._feed_lowered(line.lower())
+    
+    def _feed_lowered(self, text):
+        self.lines_scanned += 1
+        groups = {group for keyword, group in KEYWORD_TABLE if keyword in text}
+        if not groups and not self.pending:
+            return self.done
+        
+        amount = None
+        if 'amount' in groups or 'lakh' in groups:
+            match = NUMBER_RE.search(text.replace(',', ''))
+            if match:
+                amount = float(match.group())
+                if 'lakh' in groups:
+                    amount = amount * 0.01
+        
+        self._advance_pending(amount)
+        
+        if 'section' in groups:
+            self.in_objects_section = True
+            return self.done
+        
+        if self.in_objects_section:
+            if 'ofs' in groups:
+                self._watch('ofs', amount)
+            if 'fresh' in groups:
+                self._watch('fresh', amount)
+            if 'total' in groups:
+                self._watch('total', amount)
+        
+        return self.done
+    
+    def feed_page(self, text):
+        self.pages_scanned += 1
+        text = text.lower()
+        if not self.pending and not any(keyword in text for keyword, _ in KEYWORD_TABLE):
+            self.lines_scanned += text.count('\n') + 1
+            return self.done
+        
+        for line in text.split('\n'):
+            if self._feed_lowered(line):
+                break
+        return self.done
+    
+    @property
+    def found_any(self):
+        return self.amounts['fresh'] is not None or self.amounts['total'] is not None
+    
+    def _watch(self, field, amount):
+        if self.amounts[field] is not None:
+            return
+        if amount is not None:
+            self.amounts[field] = amount
+            return
+        if not any(pending[0] == field for pending in self.pending):
+            self.pending.append([field, AMOUNT_WINDOW_LINES - 1])
+    
+    def _advance_pending(self, amount):
+        remaining = []
+        for field, lines_left in self.pending:
+            if self.amounts[field] is not None:
+                continue
+            if amount is not None:
+                self.amounts[field] = amount
+                continue
+            if lines_left > 1:
+                remaining.append([field, lines_left - 1])
+        self.pending = remaining
+    
+    def result(self, pdf_path):
+        fresh_issue = self.amounts['fresh']
+        total_issue_size = self.amounts['total']
+        
+        if fresh_issue and total_issue_size:
+            ofs_ratio = (total_issue_size - fresh_issue) / total_issue_size if total_issue_size > 0 else 0
+        elif fresh_issue:
+            ofs_ratio = 0
+        else:
+            ofs_ratio = 1.0 if total_issue_size else None
+        
+        return {
+            'ofsRatio': ofs_ratio if ofs_ratio is not None else 0.5,
+            'freshIssue': fresh_issue if fresh_issue is not None else 0,
+            'totalIssueSize': total_issue_size if total_issue_size is not None else 0,
+            'pdfSource': pdf_path,
+            'pagesParsed': self.pages_scanned,
+            'pageCount': self.page_count,
+            'locator': self.locator
+        }
+
+def iter_page_texts(pdf, page_indices=None):
+    pages = pdf.pages
+    if page_indices is None:
+        page_indices = range(len(pages))
+    
+    for index in page_indices:
+        page = pages[index]
+        text = page.extract_text() or ''
+        page.close()
+        yield text
+
+def scan_pages(pdf, scanner, page_indices=None):
+    for text in iter_page_texts(pdf, page_indices):
+        if scanner.feed_page(text):
+            break
+    return scanner
+
+def _title_rank(title):
+    title = ' '.join(title.lower().split())
+    for rank, names in enumerate(LOCATOR_TITLES):
+        if any(name in title for name in names):
+            return rank
+    return None
+
+def _pick_section(entries, page_count, slack):
+    best = None
+    for i, (title, page_index) in enumerate(entries):
+        rank = _title_rank(title)
+        if rank is None or page_index is None or not 0 <= page_index < page_count:
+            continue
+        if best is None or rank < best[0]:
+            best = (rank, i)
+    if best is None:
+        return None
+    
+    i = best[1]
+    start = entries[i][1]
+    later = [page_index for _, page_index in entries[i + 1:] if page_index is not None and page_index > start]
+    end = min(later) + 1 if later else start + DRHP_LOCATOR_SLACK_PAGES
+    return start, min(end + slack, page_count)
+
+def _outline_page_index(pdf, dest, action, page_ids):
+    if dest is None and isinstance(action, dict):
+        dest = action.get('D')
+    dest = resolve1(dest)
+    if isinstance(dest, (str, bytes, PSLiteral)):
+        name = dest.name if isinstance(dest, PSLiteral) else dest
+        dest = resolve1(pdf.doc.get_dest(name))
+    if isinstance(dest, dict):
+        dest = resolve1(dest.get('D'))
+    if isinstance(dest, list) and dest and isinstance(dest[0], PDFObjRef):
+        return page_ids.get(dest[0].objid)
+    return None
+
+def locate_from_outline(pdf):
+    try:
+        outlines = list(pdf.doc.get_outlines())
+    except Exception:
+        return None
+    if not outlines:
         return None
+    
+    page_ids = {page.page_obj.pageid: i for i, page in enumerate(pdf.pages)}
+    entries = []
+    for level, title, dest, action, _ in outlines:
+        try:
+            page_index = _outline_page_index(pdf, dest, action, page_ids)
+        except Exception:
+            page_index = None
+        entries.append((title or '', page_index))
+    
+    return _pick_section(entries, len(pdf.pages), 0)
 
-def extract_drhp_data(pdf_path):
-    ofs_ratio = None
-    fresh_issue = None
-    total_issue_size = None
+def locate_from_toc(pdf):
+    pages = pdf.pages
+    entries = []
+    texts = []
+    for text in iter_page_texts(pdf, range(min(DRHP_TOC_SCAN_PAGES, len(pages)))):
+        texts.append(text)
+        page_entries = []
+        for line in text.split('\n'):
+            match = TOC_ENTRY_RE.match(line)
+            if match:
+                page_entries.append((match.group('title'), int(match.group('page')) - 1))
+        if entries and not page_entries:
+            break
+        entries.extend(page_entries)
+    
+    # Printed page numbers usually trail the PDF page index because of the
+    # unnumbered cover and front matter, so widen the range by the slack.
+    return _pick_section(entries, len(pages), DRHP_LOCATOR_SLACK_PAGES), texts
+
+def locate_objects_section(pdf):
+    section = locate_from_outline(pdf)
+    if section:
+        return section, 'outline', []
+    section, texts = locate_from_toc(pdf)
+    if section:
+        return section, 'toc', texts
+    return None, 'full', texts
+
+def record_extraction(result):
+    with _extraction_stats_lock:
+        _extraction_stats['documents'] += 1
+        _extraction_stats['pagesParsed'] += result.get('pagesParsed', 0)
+        _extraction_stats['pagesTotal'] += result.get('pageCount', 0)
+        _extraction_stats['locator'][result.get('locator', 'full')] += 1
+
+def drhp_extraction_stats():
+    with _extraction_stats_lock:
+        documents = _extraction_stats['documents']
+        return {
+            **_extraction_stats,
+            'locator': dict(_extraction_stats['locator']),
+            'pagesParsedPerDocument': _extraction_stats['pagesParsed'] / documents if documents else 0.0
+        }
+
+def extract_drhp_data(pdf_path, workers=None, locate=True, raise_errors=False):
+    workers = workers or DRHP_WORKERS
+    scanner = DrhpScanner()
     
     try:
         with pdfplumber.open(pdf_path) as pdf:
-            full_text = ''
-            for page in pdf.pages:
-                full_text += page.extract_text() or ''
+            page_count = len(pdf.pages)
+            section, method, leading_texts = locate_objects_section(pdf) if locate else (None, 'full', [])
+            pages_parsed = len(leading_texts)
             
-            lines = full_text.split('\n')
-            in_objects_section = False
+            if section:
+                scan_pages(pdf, scanner, range(*section))
+                pages_parsed += scanner.pages_scanned
+                if scanner.found_any:
+                    scanner.locator = method
+                else:
+                    scanner = DrhpScanner()
             
-            for i, line in enumerate(lines):
-                if 'objects of the issue' in line.lower() or 'objects of issue' in line.lower():
-                    in_objects_section = True
-                    continue
-                
-                if in_objects_section:
-                    if 'offer for sale' in line.lower() or 'ofs' in line.lower():
-                        for j in range(i, min(i + 10, len(lines))):
-                            text = lines[j].lower()
-                            if 'rs.' in text or 'crore' in text or 'lakh' in text:
-                                numbers = extract_numbers(lines[j])
-                                if numbers:
-                                    ofs_value = numbers[0]
-                                    if 'lakh' in text:
-                                        ofs_value = ofs_value * 0.01
-                                    break
-                    
-                    if 'fresh issue' in line.lower() or 'new issue' in line.lower():
-                        for j in range(i, min(i + 10, len(lines))):
-                            text = lines[j].lower()
-                            if 'rs.' in text or 'crore' in text or 'lakh' in text:
-                                numbers = extract_numbers(lines[j])
-                                if numbers:
-                                    fresh_value = numbers[0]
-                                    if 'lakh' in text:
-                                        fresh_value = fresh_value * 0.01
-                                    fresh_issue = fresh_value
-                                    break
-                    
-                    if 'total issue' in line.lower() or 'aggregate issue' in line.lower():
-                        for j in range(i, min(i + 10, len(lines))):
-                            text = lines[j].lower()
-                            if 'rs.' in text or 'crore' in text or 'lakh' in text:
-                                numbers = extract_numbers(lines[j])
-                                if numbers:
-                                    total_value = numbers[0]
-                                    if 'lakh' in text:
-                                        total_value = total_value * 0.01
-                                    total_issue_size = total_value
-                                    break
-                    
-                    if ofs_ratio is not None and fresh_issue is not None:
+            if scanner.locator == 'full':
+                scanner.page_count = page_count
+                # Pages already read while looking for a TOC are scanned from
+                # memory instead of being extracted a second time.
+                for text in leading_texts:
+                    if scanner.feed_page(text):
                         break
-            
-            if fresh_issue and total_issue_size:
-                ofs_ratio = (total_issue_size - fresh_issue) / total_issue_size if total_issue_size > 0 else 0
-            elif fresh_issue:
-                ofs_ratio = 0
-            else:
-                ofs_ratio = 1.0 if total_issue_size else None
                 
+                scanned = scanner.pages_scanned
+                if not scanner.done:
+                    if workers > 1:
+                        _scan_parallel(pdf_path, scanner, workers, first_page=len(leading_texts))
+                    else:
+                        scan_pages(pdf, scanner, range(len(leading_texts), page_count))
+                pages_parsed += scanner.pages_scanned - scanned
+            
+            scanner.page_count = page_count
+            scanner.pages_scanned = pages_parsed
+    except BrokenProcessPool:
+        # The lease has already dropped the broken pool.
+        pass
+    except (DrhpLimitError, MemoryError):
+        raise
+    except Exception:
+        # The API falls back to default features for unreadable documents;
+        # batch runs need to know so the entry is retried.
+        if raise_errors:
+            raise
+    
+    result = scanner.result(pdf_path)
+    record_extraction(result)
+    return result
+
+@contextmanager
+def _leased_page_pool(workers):
+    # Other requests may be scanning on the shared pool. A pool replaced
+    # for a different worker count, or one that broke, is shut down only
+    # once its last user is done with it. Spawned workers start clean
+    # rather than inheriting a copy of a threaded server process.
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != workers:
+            if _page_pool is not None and not _page_pool_users.get(_page_pool):
+                _page_pool.shutdown(wait=False)
+            _page_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _page_pool_workers = workers
+        pool = _page_pool
+        _page_pool_users[pool] = _page_pool_users.get(pool, 0) + 1
+    
+    try:
+        yield pool
+    except BrokenProcessPool:
+        with _page_pool_lock:
+            if _page_pool is pool:
+                _page_pool = None
+        raise
+    finally:
+        with _page_pool_lock:
+            _page_pool_users[pool] -= 1
+            retired = not _page_pool_users[pool] and pool is not _page_pool
+            if not _page_pool_users[pool]:
+                del _page_pool_users[pool]
+        if retired:
+            pool.shutdown(wait=False)
+
+def shutdown_page_pool():
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=True, cancel_futures=True)
+            _page_pool = None
+
+def _extract_page_range_text(pdf_path, start, end):
+    texts = []
+    with pdfplumber.open(pdf_path, pages=list(range(start + 1, end + 1))) as pdf:
+        for page in pdf.pages:
+            texts.append(page.extract_text() or '')
+            page.close()
+    return texts
+
+def page_ranges(page_count, workers, chunk_pages=None, first_page=0):
+    chunk_pages = chunk_pages or DRHP_CHUNK_PAGES
+    # Keep several chunks per worker so early chunks finish first and the
+    # in-order scan can stop before the tail of the document is parsed.
+    size = max(1, min(chunk_pages, math.ceil((page_count - first_page) / (workers * 4))))
+    return [(start, min(start + size, page_count)) for start in range(first_page, page_count, size)]
+
+def _scan_parallel(pdf_path, scanner, workers, chunk_pages=None, first_page=0):
+    with _leased_page_pool(workers) as pool:
+        futures = [
+            pool.submit(_extract_page_range_text, pdf_path, start, end)
+            for start, end in page_ranges(scanner.page_count, workers, chunk_pages, first_page)
+        ]
+        try:
+            for future in futures:
+                for text in future.result():
+                    if scanner.feed_page(text):
+                        return scanner
+        finally:
+            for future in futures:
+                future.cancel()
+    return scanner
+
+def extract_drhp_data_parallel(pdf_path, workers=None, chunk_pages=None):
+    workers = workers or DRHP_WORKERS or os.cpu_count() or 1
+    scanner = DrhpScanner()
+    
+    try:
+        with pdfplumber.open(pdf_path) as pdf:
+            scanner.page_count = len(pdf.pages)
+        _scan_parallel(pdf_path, scanner, workers, chunk_pages)
+    except BrokenProcessPool:
+        # The lease has already dropped the broken pool.
+        pass
+    except (DrhpLimitError, MemoryError):
+        raise
     except Exception:
         pass
     
-    return {
-        'ofsRatio': ofs_ratio if ofs_ratio is not None else 0.5,
-        'freshIssue': fresh_issue if fresh_issue is not None else 0,
-        'totalIssueSize': total_issue_size if total_issue_size is not None else 0,
-        'pdfSource': pdf_path
-    }
+    result = scanner.result(pdf_path)
+    record_extraction(result)
+    return result
 
 def extract_numbers(text):
-    import re
-    numbers = re.findall(r'[\d,]+\.?\d*', text.replace(',', ''))
-    return [float(n) for n in numbers if n]
+    return [float(n) for n in NUMBER_RE.findall(text.replace(',', ''))]
+
+def batch_sources(source):
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name) for name in os.listdir(source)
+            if name.lower().endswith('.pdf')
+        )
+    
+    sources = []
+    with open(source) as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                sources.append(line)
+    return sources
+
+def processed_sources(output_path):
+    done = set()
+    if not output_path or not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('status') == 'ok':
+                done.add(record.get('source'))
+    return done
+
+def process_document(source):
+    started = time.perf_counter()
+    record = {'source': source}
+    is_url = source.startswith(('http://', 'https://'))
+    pdf_path = download_pdf(source) if is_url else source
+    downloaded = time.perf_counter()
+    
+    try:
+        if not pdf_path or not os.path.exists(pdf_path):
+            record['status'] = 'error'
+            record['error'] = 'download failed' if is_url else 'file not found'
+        else:
+            record.update(extract_drhp_data(pdf_path, workers=1, raise_errors=True))
+            record['pdfSource'] = source
+            if record.get('pageCount'):
+                record['status'] = 'ok'
+            else:
+                record['status'] = 'error'
+                record['error'] = 'no pages extracted'
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e) or type(e).__name__
+    finally:
+        if is_url and pdf_path and os.path.exists(pdf_path):
+            os.unlink(pdf_path)
+    
+    finished = time.perf_counter()
+    record['timing'] = {
+        'downloadSeconds': round(downloaded - started, 3) if is_url else 0.0,
+        'extractSeconds': round(finished - downloaded, 3),
+        'totalSeconds': round(finished - started, 3)
+    }
+    return record
+
+def run_batch(source, output_path=None, concurrency=None):
+    done = processed_sources(output_path)
+    pending = [item for item in batch_sources(source) if item not in done]
+    concurrency = concurrency or os.cpu_count() or 1
+    out = open(output_path, 'a') if output_path else sys.stdout
+    
+    try:
+        with ProcessPoolExecutor(max_workers=concurrency, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(process_document, item): item for item in pending}
+            for future in as_completed(futures):
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {'source': futures[future], 'status': 'error', 'error': str(e)}
+                out.write(json.dumps(record) + '\n')
+                out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    
+    return len(pending), len(done)
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(description='Extract DRHP features for many documents to JSONL')
+    parser.add_argument('source', help='Directory of PDFs or a file with one DRHP URL per line')
+    parser.add_argument('-o', '--output', help='JSONL file to append to; already processed entries are skipped')
+    parser.add_argument('-j', '--concurrency', type=int, default=None, help='Documents processed in parallel')
+    args = parser.parse_args(argv)
+    
+    processed, skipped = run_batch(args.source, args.output, args.concurrency)
+    print(f"Processed {processed} documents, skipped {skipped} already done", file=sys.stderr)
 
 if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        batch_main(sys.argv[2:])
+        sys.exit(0)
+    
     pdf_url = sys.argv[1] if len(sys.argv) > 1 else ''
     
     pdf_path = None
@@ -1,78 +1,585 @@
 import sys
 import json
-import requests
+import os
+import math
+import hashlib
+import sqlite3
+import http_client
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from itertools import islice
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 import time
+from datetime import datetime, timezone
+
+REDDIT_SEARCH_URL = 'https://www.reddit.com/r/IndianStreetBets/search.json'
+NEWS_SEARCH_URL = 'https://newsapi.org/v2/everything'
+
+REDDIT_MAX_ITEMS = int(os.getenv('REDDIT_MAX_ITEMS', 1000))
+REDDIT_TIME_BUDGET_SECONDS = float(os.getenv('REDDIT_TIME_BUDGET_SECONDS', 20))
+SENTIMENT_STREAM_CHUNK = int(os.getenv('SENTIMENT_STREAM_CHUNK', 100))
+
+SENTIMENT_WORKERS = int(os.getenv('SENTIMENT_WORKERS', 1))
+SENTIMENT_PARALLEL_MIN_TEXTS = int(os.getenv('SENTIMENT_PARALLEL_MIN_TEXTS', 2000))
+
+_analyzer = None
+_analyzer_lock = threading.Lock()
+
+_sentiment_pool = None
+_sentiment_pool_workers = 0
+_sentiment_pool_users = {}
+_sentiment_pool_lock = threading.Lock()
+
+SENTIMENT_CACHE_SIZE = int(os.getenv('SENTIMENT_CACHE_SIZE', 50000))
+SENTIMENT_CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH', '')
+
+_sentiment_cache_lock = threading.Lock()
+_sentiment_cache = OrderedDict()
+_sentiment_cache_stats = {
+    'hits': 0,
+    'diskHits': 0,
+    'misses': 0,
+    'evictions': 0
+}
+_sentiment_db = None
+# The connection is shared by every thread, and the state merge below runs
+# a multi-statement transaction on it.
+_sentiment_db_lock = threading.Lock()
+
+SENTIMENT_STATE_MAX_IDS = int(os.getenv('SENTIMENT_STATE_MAX_IDS', 5000))
+SENTIMENT_STATE_MAX_TRACKED = int(os.getenv('SENTIMENT_STATE_MAX_TRACKED', 1000))
+
+_sentiment_state = OrderedDict()
+_sentiment_state_locks = {}
+_sentiment_state_lock = threading.Lock()
+_refresh_stats = {
+    'refreshes': 0,
+    'itemsFetched': 0,
+    'itemsNew': 0,
+    'merged': 0,
+    'evictions': 0
+}
+
+def _fetch_reddit_page(company_name, after=None, limit=100, sort='relevance'):
+    params = {
+        'q': company_name,
+        'limit': min(limit, 100),
+        'sort': sort,
+        'restrict_sr': 'true'
+    }
+    if after:
+        params['after'] = after
+    headers = {
+        'User-Agent': 'IPO-Screener-Bot/1.0'
+    }
+    
+    response = http_client.get(REDDIT_SEARCH_URL, params=params, headers=headers, timeout=10)
+    if response.status_code != 200:
+        return [], None
+    data = response.json().get('data') or {}
+    posts = [child['data'] for child in data.get('children', []) if 'data' in child]
+    return posts, data.get('after')
+
+def _post_text(post):
+    return post.get('title', '') + ' ' + post.get('selftext', '')
+
+def iter_reddit_posts(company_name, sort='relevance', max_items=None, time_budget=None, page_size=100):
+    max_items = REDDIT_MAX_ITEMS if max_items is None else max_items
+    time_budget = REDDIT_TIME_BUDGET_SECONDS if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+    
+    # The budget is checked before each page, so time the consumer spends
+    # scoring the previous page counts against it too.
+    yielded = 0
+    after = None
+    while yielded < max_items and time.monotonic() < deadline:
+        try:
+            posts, after = _fetch_reddit_page(company_name, after=after, limit=min(page_size, max_items - yielded), sort=sort)
+        except Exception:
+            return
+        for post in posts:
+            yield post
+            yielded += 1
+            if yielded >= max_items:
+                return
+        if not posts or not after:
+            return
 
 def scrape_reddit_mentions(company_name, limit=100):
     mentions = []
     try:
-        url = f"https://www.reddit.com/r/IndianStreetBets/search.json"
-        params = {
-            'q': company_name,
-            'limit': min(limit, 100),
-            'sort': 'relevance',
-            'restrict_sr': 'true'
-        }
-        headers = {
-            'User-Agent': 'IPO-Screener-Bot/1.0'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if 'data' in data and 'children' in data['data']:
-                for post in data['data']['children']:
-                    if 'data' in post:
-                        title = post['data'].get('title', '')
-                        selftext = post['data'].get('selftext', '')
-                        mentions.append(title + ' ' + selftext)
+        mentions = [_post_text(post) for post in iter_reddit_posts(company_name, max_items=limit)]
     except Exception:
         pass
     
     return mentions
 
+def _fetch_news_articles(company_name, limit=50, sort_by='relevance', since=None):
+    params = {
+        'q': f"{company_name} IPO India",
+        'language': 'en',
+        'sortBy': sort_by,
+        'pageSize': min(limit, 50)
+    }
+    if since:
+        params['from'] = since
+    headers = {
+        'User-Agent': 'IPO-Screener-Bot/1.0'
+    }
+    
+    response = http_client.get(NEWS_SEARCH_URL, params=params, headers=headers, timeout=10)
+    if response.status_code != 200:
+        return []
+    return response.json().get('articles') or []
+
+def _article_text(article):
+    return (article.get('title') or '') + ' ' + (article.get('description') or '')
+
 def scrape_news_headlines(company_name, limit=50):
     headlines = []
     try:
-        search_query = f"{company_name} IPO India"
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'q': search_query,
-            'language': 'en',
-            'sortBy': 'relevance',
-            'pageSize': min(limit, 50)
-        }
-        headers = {
-            'User-Agent': 'IPO-Screener-Bot/1.0'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            if 'articles' in data:
-                for article in data['articles']:
-                    title = article.get('title', '')
-                    description = article.get('description', '')
-                    headlines.append(title + ' ' + description)
+        headlines = [_article_text(article) for article in _fetch_news_articles(company_name, limit=limit)]
     except Exception:
         pass
     
     return headlines
 
+def get_sentiment_analyzer():
+    # Building an analyzer re-reads the VADER lexicon and emoji files, so one
+    # instance is shared; polarity_scores only reads that state.
+    global _analyzer
+    if _analyzer is None:
+        with _analyzer_lock:
+            if _analyzer is None:
+                _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+def preload_sentiment_analyzer():
+    return get_sentiment_analyzer()
+
+def _score_chunk(texts):
+    analyzer = get_sentiment_analyzer()
+    return [analyzer.polarity_scores(text)['compound'] for text in texts]
+
+@contextmanager
+def _leased_sentiment_pool(workers):
+    # Same lifecycle as module_b's page pool: a replaced or broken pool is
+    # shut down once the last request using it has finished.
+    global _sentiment_pool, _sentiment_pool_workers
+    with _sentiment_pool_lock:
+        if _sentiment_pool is None or _sentiment_pool_workers != workers:
+            if _sentiment_pool is not None and not _sentiment_pool_users.get(_sentiment_pool):
+                _sentiment_pool.shutdown(wait=False)
+            _sentiment_pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=preload_sentiment_analyzer
+            )
+            _sentiment_pool_workers = workers
+        pool = _sentiment_pool
+        _sentiment_pool_users[pool] = _sentiment_pool_users.get(pool, 0) + 1
+    
+    try:
+        yield pool
+    except BrokenProcessPool:
+        with _sentiment_pool_lock:
+            if _sentiment_pool is pool:
+                _sentiment_pool = None
+        raise
+    finally:
+        with _sentiment_pool_lock:
+            _sentiment_pool_users[pool] -= 1
+            retired = not _sentiment_pool_users[pool] and pool is not _sentiment_pool
+            if not _sentiment_pool_users[pool]:
+                del _sentiment_pool_users[pool]
+        if retired:
+            pool.shutdown(wait=False)
+
+def shutdown_sentiment_pool():
+    global _sentiment_pool
+    with _sentiment_pool_lock:
+        if _sentiment_pool is not None:
+            _sentiment_pool.shutdown(wait=True, cancel_futures=True)
+            _sentiment_pool = None
+
+def _compound_scores(texts, workers):
+    if workers <= 1 or len(texts) < SENTIMENT_PARALLEL_MIN_TEXTS:
+        return _score_chunk(texts)
+    
+    chunk_size = math.ceil(len(texts) / (workers * 4))
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    try:
+        with _leased_sentiment_pool(workers) as pool:
+            return [score for chunk_scores in pool.map(_score_chunk, chunks) for score in chunk_scores]
+    except Exception:
+        return _score_chunk(texts)
+
+def text_key(text):
+    # VADER tokenises on whitespace, so collapsing it cannot change a score.
+    # Case is kept because VADER boosts words written in capitals.
+    return hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+
+def _get_sentiment_db():
+    global _sentiment_db
+    if _sentiment_db is None and SENTIMENT_CACHE_PATH:
+        try:
+            db = sqlite3.connect(SENTIMENT_CACHE_PATH, check_same_thread=False)
+            db.execute('CREATE TABLE IF NOT EXISTS sentiment_scores (hash TEXT PRIMARY KEY, compound REAL NOT NULL)')
+            db.execute('CREATE TABLE IF NOT EXISTS sentiment_state (company TEXT, source TEXT, state TEXT NOT NULL, PRIMARY KEY (company, source))')
+            db.commit()
+            _sentiment_db = db
+        except sqlite3.Error:
+            return None
+    return _sentiment_db
+
+def _remember_scores(scores):
+    for key, compound in scores.items():
+        _sentiment_cache[key] = compound
+        _sentiment_cache.move_to_end(key)
+    while len(_sentiment_cache) > SENTIMENT_CACHE_SIZE:
+        _sentiment_cache.popitem(last=False)
+        _sentiment_cache_stats['evictions'] += 1
+
+def _cached_scores(keys):
+    found = {}
+    with _sentiment_cache_lock:
+        for key in keys:
+            compound = _sentiment_cache.get(key)
+            if compound is not None:
+                _sentiment_cache.move_to_end(key)
+                found[key] = compound
+        _sentiment_cache_stats['hits'] += len(found)
+    
+    # The disk lookup runs outside the cache lock, so requests answered from
+    # memory are not held up behind it.
+    missing = [key for key in keys if key not in found]
+    from_disk = {}
+    with _sentiment_db_lock:
+        db = _get_sentiment_db()
+        if db is not None and missing:
+            try:
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = db.execute(
+                        f"SELECT hash, compound FROM sentiment_scores WHERE hash IN ({','.join('?' * len(chunk))})",
+                        chunk
+                    ).fetchall()
+                    from_disk.update(rows)
+            except sqlite3.Error:
+                pass
+    found.update(from_disk)
+    
+    with _sentiment_cache_lock:
+        _sentiment_cache_stats['diskHits'] += len(from_disk)
+        _sentiment_cache_stats['misses'] += len(keys) - len(found)
+        if SENTIMENT_CACHE_SIZE > 0:
+            _remember_scores(from_disk)
+    return found
+
+def _store_scores(scores):
+    if not scores:
+        return
+    with _sentiment_cache_lock:
+        if SENTIMENT_CACHE_SIZE > 0:
+            _remember_scores(scores)
+    with _sentiment_db_lock:
+        db = _get_sentiment_db()
+        if db is not None:
+            try:
+                db.executemany('INSERT OR REPLACE INTO sentiment_scores (hash, compound) VALUES (?, ?)', scores.items())
+                db.commit()
+            except sqlite3.Error:
+                pass
+
+def clear_sentiment_cache():
+    with _sentiment_cache_lock:
+        _sentiment_cache.clear()
+
+def sentiment_cache_stats():
+    with _sentiment_cache_lock:
+        lookups = _sentiment_cache_stats['hits'] + _sentiment_cache_stats['diskHits'] + _sentiment_cache_stats['misses']
+        hits = _sentiment_cache_stats['hits'] + _sentiment_cache_stats['diskHits']
+        return {
+            **_sentiment_cache_stats,
+            'size': len(_sentiment_cache),
+            'maxSize': SENTIMENT_CACHE_SIZE,
+            'persistent': bool(SENTIMENT_CACHE_PATH),
+            'hitRatio': hits / lookups if lookups else 0.0
+        }
+
+def _memoized_compound_scores(texts, workers):
+    keys = [text_key(text) for text in texts]
+    unique_keys = list(dict.fromkeys(keys))
+    known = _cached_scores(unique_keys)
+    
+    # Repeats inside one batch are scored once as well.
+    to_score = {}
+    for key, text in zip(keys, texts):
+        if key not in known and key not in to_score:
+            to_score[key] = text
+    fresh = dict(zip(to_score, _compound_scores(list(to_score.values()), workers)))
+    _store_scores(fresh)
+    known.update(fresh)
+    return [known[key] for key in keys]
+
+def score_texts(texts, weights=None, workers=None):
+    workers = workers or SENTIMENT_WORKERS
+    if weights is not None and len(weights) != len(texts):
+        raise ValueError('weights must have the same length as texts')
+    
+    indices = [i for i, text in enumerate(texts) if text and text.strip()]
+    compounds = _memoized_compound_scores([texts[i] for i in indices], workers)
+    
+    scores = [None] * len(texts)
+    for i, compound in zip(indices, compounds):
+        scores[i] = compound
+    
+    count = len(compounds)
+    mean = sum(compounds) / count if count else 0.0
+    weighted_mean = mean
+    if weights is not None and count:
+        total_weight = sum(weights[i] for i in indices)
+        if total_weight > 0:
+            weighted_mean = sum(weights[i] * compound for i, compound in zip(indices, compounds)) / total_weight
+    
+    return {
+        'scores': scores,
+        'count': count,
+        'mean': mean,
+        'weightedMean': weighted_mean
+    }
+
 def calculate_sentiment_score(texts):
-    analyzer = SentimentIntensityAnalyzer()
-    scores = []
-    
-    for text in texts:
-        if text and text.strip():
-            score = analyzer.polarity_scores(text)
-            scores.append(score['compound'])
-    
-    if scores:
-        avg_score = sum(scores) / len(scores)
-        return avg_score
-    return 0.0
+    return score_texts(texts)['mean']
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _state_key(company_name, source):
+    return (' '.join(company_name.lower().split()), source)
+
+def _lock_for(key):
+    with _sentiment_state_lock:
+        return _sentiment_state_locks.setdefault(key, threading.Lock())
+
+def _empty_state():
+    return {
+        'seenIds': [],
+        'lastTimestamp': 0.0,
+        'sum': 0.0,
+        'count': 0,
+        'version': 0,
+        'updatedAt': None
+    }
+
+def _read_stored_state(db, key):
+    row = db.execute('SELECT state FROM sentiment_state WHERE company = ? AND source = ?', key).fetchone()
+    return {**_empty_state(), **json.loads(row[0])} if row else None
+
+def _load_state(key, reload=False):
+    # A refresh passes reload=True so it starts from whatever another
+    # process last saved, not from this process's copy.
+    with _sentiment_state_lock:
+        state = _sentiment_state.get(key)
+        if state is not None:
+            _sentiment_state.move_to_end(key)
+            if not reload:
+                return state
+    
+    stored = None
+    with _sentiment_db_lock:
+        db = _get_sentiment_db()
+        if db is not None:
+            try:
+                stored = _read_stored_state(db, key)
+            except (sqlite3.Error, ValueError):
+                pass
+    if stored is None:
+        return state if state is not None else _publish_state(key, _empty_state(), replace=False)
+    return _publish_state(key, stored, replace=state is None or stored['version'] > state['version'])
+
+def _trim_state():
+    # Keys with a refresh in progress are skipped, so their lock stays the
+    # one every caller sees.
+    for key in list(_sentiment_state):
+        if len(_sentiment_state) <= SENTIMENT_STATE_MAX_TRACKED:
+            return
+        lock = _sentiment_state_locks.get(key)
+        if lock is not None and lock.locked():
+            continue
+        del _sentiment_state[key]
+        _sentiment_state_locks.pop(key, None)
+        _refresh_stats['evictions'] += 1
+
+def _publish_state(key, state, replace=True):
+    with _sentiment_state_lock:
+        if replace or key not in _sentiment_state:
+            _sentiment_state[key] = state
+        _sentiment_state.move_to_end(key)
+        _trim_state()
+        return _sentiment_state.get(key, state)
+
+def _merge_state(stored, added):
+    # Items counted by both writers are only counted once; seenIds is
+    # capped, so this is exact for anything inside that window.
+    seen = set(stored['seenIds'])
+    extra = [item for item in added if item[0] not in seen]
+    return {
+        **stored,
+        'sum': stored['sum'] + sum(score for _, _, score in extra),
+        'count': stored['count'] + len(extra),
+        'seenIds': (stored['seenIds'] + [item_id for item_id, _, _ in extra])[-SENTIMENT_STATE_MAX_IDS:],
+        'lastTimestamp': max([stored['lastTimestamp']] + [timestamp for _, timestamp, _ in extra])
+    }
+
+def _save_state(key, base, state, added):
+    # Several server processes can refresh the same company. The stored row
+    # is re-read inside a write transaction; if another process saved after
+    # this refresh loaded base, the new items are added to its totals
+    # instead of overwriting them.
+    with _sentiment_db_lock:
+        db = _get_sentiment_db()
+        if db is None:
+            return state
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            stored = _read_stored_state(db, key)
+            if stored is not None and stored['version'] != base['version']:
+                state = {**_merge_state(stored, added), 'updatedAt': state['updatedAt']}
+                with _sentiment_state_lock:
+                    _refresh_stats['merged'] += 1
+            state = {**state, 'version': max(base['version'], stored['version'] if stored else 0) + 1}
+            db.execute('INSERT OR REPLACE INTO sentiment_state (company, source, state) VALUES (?, ?, ?)', key + (json.dumps(state),))
+            db.commit()
+        except (sqlite3.Error, ValueError):
+            db.rollback()
+    return state
+
+def _state_summary(key, state, fetched=0, new_items=0):
+    return {
+        'source': key[1],
+        'count': state['count'],
+        'sum': state['sum'],
+        'mean': state['sum'] / state['count'] if state['count'] else 0.0,
+        'fetched': fetched,
+        'newItems': new_items,
+        'lastTimestamp': state['lastTimestamp']
+    }
+
+def _apply_new_items(key, state, items):
+    base = state
+    added = []
+    seen = set(state['seenIds'])
+    fetched = 0
+    new_items = 0
+    for chunk in _chunks(items, SENTIMENT_STREAM_CHUNK):
+        fresh = []
+        for item in chunk:
+            if item[0] not in seen:
+                seen.add(item[0])
+                fresh.append(item)
+        scored = [
+            (item_id, timestamp, score)
+            for (item_id, timestamp, _), score in zip(fresh, score_texts([text for _, _, text in fresh])['scores'])
+            if score is not None
+        ]
+        scores = [score for _, _, score in scored]
+        added.extend(scored)
+        
+        # Each chunk publishes a new state dict rather than changing the
+        # current one, so a lock-free snapshot sees consistent totals.
+        state = {
+            **state,
+            'sum': state['sum'] + sum(scores),
+            'count': state['count'] + len(scores),
+            'seenIds': (state['seenIds'] + [item_id for item_id, _, _ in fresh])[-SENTIMENT_STATE_MAX_IDS:],
+            'lastTimestamp': max([state['lastTimestamp']] + [timestamp for _, timestamp, _ in fresh])
+        }
+        _publish_state(key, state)
+        fetched += len(chunk)
+        new_items += len(fresh)
+    state = _save_state(key, base, {**state, 'updatedAt': time.time()}, added)
+    _publish_state(key, state)
+    
+    with _sentiment_state_lock:
+        _refresh_stats['refreshes'] += 1
+        _refresh_stats['itemsFetched'] += fetched
+        _refresh_stats['itemsNew'] += new_items
+    return _state_summary(key, state, fetched, new_items)
+
+def _unseen_reddit_items(company_name, seen, since, limit, time_budget):
+    # Newest first, until we reach a post an earlier refresh already counted.
+    for post in iter_reddit_posts(company_name, sort='new', max_items=limit, time_budget=time_budget):
+        post_id = post.get('name') or post.get('id')
+        created = float(post.get('created_utc') or 0)
+        if post_id in seen or created < since:
+            return
+        yield post_id, created, _post_text(post)
+
+def refresh_reddit_sentiment(company_name, limit=None, time_budget=None):
+    key = _state_key(company_name, 'reddit')
+    with _lock_for(key):
+        state = _load_state(key, reload=True)
+        items = _unseen_reddit_items(company_name, set(state['seenIds']), state['lastTimestamp'], limit, time_budget)
+        return _apply_new_items(key, state, items)
+
+def _published_timestamp(article):
+    try:
+        return datetime.fromisoformat(article['publishedAt'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return 0.0
+
+def refresh_news_sentiment(company_name, limit=50):
+    key = _state_key(company_name, 'news')
+    with _lock_for(key):
+        state = _load_state(key, reload=True)
+        since = None
+        if state['lastTimestamp']:
+            since = datetime.fromtimestamp(state['lastTimestamp'], timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
+        
+        items = []
+        try:
+            for article in _fetch_news_articles(company_name, limit=limit, sort_by='publishedAt', since=since):
+                article_id = article.get('url') or _article_text(article)
+                items.append((article_id, _published_timestamp(article), _article_text(article)))
+        except Exception:
+            pass
+        
+        return _apply_new_items(key, state, items)
+
+def sentiment_snapshot(company_name, source):
+    # Deliberately skips the per-company lock so a caller past its deadline
+    # gets the last aggregate instead of waiting on a refresh in flight;
+    # published states are never changed in place.
+    key = _state_key(company_name, source)
+    return _state_summary(key, _load_state(key))
+
+def combine_sentiment(reddit, news):
+    count = reddit['count'] + news['count']
+    return {
+        'vaderScore': (reddit['sum'] + news['sum']) / count if count else 0.0,
+        'redditMentions': reddit['count'],
+        'newsHeadlines': news['count'],
+        'newRedditPosts': reddit['newItems'],
+        'newNewsArticles': news['newItems']
+    }
+
+def sentiment_refresh_stats():
+    with _sentiment_state_lock:
+        return {
+            **_refresh_stats,
+            'tracked': len(_sentiment_state),
+            'maxTracked': SENTIMENT_STATE_MAX_TRACKED
+        }
 
 if __name__ == '__main__':
     company_name = sys.argv[1] if len(sys.argv) > 1 else ''
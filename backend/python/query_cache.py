@@ -0,0 +1,131 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+QUERY_CACHE_TTL_SECONDS = float(os.getenv('QUERY_CACHE_TTL_SECONDS', 300))
+QUERY_CACHE_MAX_ENTRIES = int(os.getenv('QUERY_CACHE_MAX_ENTRIES', 1024))
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._events = []
+        self._listeners = []
+    
+    def subscribe(self, on_event):
+        # A caller that joins late is first replayed what it missed, under
+        # the same lock publish holds, so it sees every event once and in order.
+        with self._lock:
+            for event, payload in self._events:
+                on_event(event, payload)
+            self._listeners.append(on_event)
+    
+    def publish(self, event, payload):
+        with self._lock:
+            self._events.append((event, payload))
+            for on_event in self._listeners:
+                on_event(event, payload)
+
+class QueryCache:
+    def __init__(self, ttl_seconds=None, max_entries=None):
+        self.ttl = QUERY_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = QUERY_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'coalesced': 0,
+            'evictions': 0
+        }
+    
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    def get(self, key):
+        with self._lock:
+            value = self._lookup(key)
+            self._stats['hits' if value is not None else 'misses'] += 1
+            return value
+    
+    def put(self, key, value):
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+    
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+    
+    def get_or_compute(self, key, compute, cacheable=None, on_event=None):
+        # compute is called with a publish(event, payload) function; every
+        # caller sharing the computation gets those events through on_event.
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self._stats['hits'] += 1
+                return value
+            
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats['misses'] += 1
+            else:
+                self._stats['coalesced'] += 1
+        
+        if on_event is not None:
+            flight.subscribe(on_event)
+        
+        # Concurrent callers for the same key wait for the leader's result
+        # instead of each running the computation.
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            flight.value = compute(flight.publish)
+            if flight.value is not None and (cacheable is None or cacheable(flight.value)):
+                self.put(key, flight.value)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self._stats['hits'] + self._stats['misses'] + self._stats['coalesced']
+            return {
+                **self._stats,
+                'size': len(self._entries),
+                'inFlight': len(self._flights),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl,
+                'hitRatio': (self._stats['hits'] + self._stats['coalesced']) / lookups if lookups else 0.0
+            }
@@ -0,0 +1,299 @@
+import os
+import json
+import time
+import random
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+script_dir = Path(__file__).parent
+
+WATCHLIST_PATH = Path(os.getenv('WATCHLIST_PATH', script_dir / 'watchlist.json'))
+WATCHLIST_REFRESH_SECONDS = float(os.getenv('WATCHLIST_REFRESH_SECONDS', 900))
+WATCHLIST_CONCURRENCY = int(os.getenv('WATCHLIST_CONCURRENCY', 2))
+WATCHLIST_MAX_SYMBOLS = int(os.getenv('WATCHLIST_MAX_SYMBOLS', 200))
+
+WATCHLIST_FIELDS = ['symbol', 'companyName', 'sector', 'drhpUrl', 'addedAt']
+
+class WatchlistFullError(Exception):
+    pass
+
+class RefreshScheduler:
+    def __init__(self, refresh_fn, interval_seconds=None, max_concurrency=None, path=None):
+        self.refresh_fn = refresh_fn
+        self.interval = interval_seconds or WATCHLIST_REFRESH_SECONDS
+        self.max_concurrency = max_concurrency or WATCHLIST_CONCURRENCY
+        self.path = Path(path) if path else WATCHLIST_PATH
+        
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._entries = {}
+        # Refresh results, held only in the process that ran them (the
+        # leader). Anything other workers need goes through refresh_fn.
+        self._results = {}
+        self._executor = None
+        self._thread = None
+        self._leader_file = None
+        self._synced_mtime = None
+        self._stats = {
+            'runs': 0,
+            'failures': 0,
+            'lastRunAt': None
+        }
+        self._load()
+    
+    def _jittered_interval(self):
+        # +/-10% keeps symbols added together from refreshing in lockstep.
+        return self.interval * random.uniform(0.9, 1.1)
+    
+    def _read(self):
+        try:
+            self._synced_mtime = self.path.stat().st_mtime_ns
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        
+        items = []
+        for item in saved:
+            if not item.get('symbol') or not item.get('companyName'):
+                continue
+            item = {field: item.get(field) for field in WATCHLIST_FIELDS}
+            item['sector'] = item['sector'] or 'General'
+            item['drhpUrl'] = item['drhpUrl'] or ''
+            items.append(item)
+        return items
+    
+    def _load(self):
+        saved = self._read() or []
+        # Spread restored symbols across one interval rather than
+        # refreshing the whole watchlist the moment the process starts.
+        now = time.time()
+        for i, item in enumerate(saved):
+            item.update(self._runtime_fields(now + self.interval * i / max(len(saved), 1)))
+            self._entries[item['symbol']] = item
+    
+    def _sync(self):
+        # Other server processes edit the same file; pick up their
+        # additions and removals when it changes underneath us.
+        try:
+            if self.path.stat().st_mtime_ns == self._synced_mtime:
+                return
+        except OSError:
+            return
+        saved = self._read()
+        if saved is None:
+            return
+        
+        symbols = set()
+        for item in saved:
+            symbols.add(item['symbol'])
+            entry = self._entries.get(item['symbol'])
+            if entry is None:
+                item.update(self._runtime_fields(time.time()))
+                self._entries[item['symbol']] = item
+            else:
+                entry.update(item)
+        for symbol in list(self._entries):
+            if symbol not in symbols:
+                del self._entries[symbol]
+                self._results.pop(symbol, None)
+    
+    def _save(self):
+        saved = [{field: entry[field] for field in WATCHLIST_FIELDS} for entry in self._entries.values()]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(saved, f, indent=2)
+        os.replace(tmp_path, self.path)
+        self._synced_mtime = self.path.stat().st_mtime_ns
+    
+    @contextmanager
+    def _file_lock(self):
+        # Serialises read-modify-write of the watchlist across processes.
+        if fcntl is None:
+            yield
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(f'{self.path}.lock', 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def _is_leader(self):
+        # Only one process refreshes the watchlist; the others take over
+        # when its lock is released, e.g. when that worker is recycled.
+        if fcntl is None or self._leader_file is not None:
+            return True
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(f'{self.path}.leader', 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._leader_file = f
+        return True
+    
+    def _runtime_fields(self, next_run_at):
+        return {
+            'nextRunAt': next_run_at,
+            'lastRunAt': None,
+            'lastStatus': None,
+            'lastElapsedMs': None,
+            'running': False
+        }
+    
+    def add(self, symbol, company_name, sector='General', drhp_url=''):
+        with self._lock, self._file_lock():
+            self._sync()
+            entry = self._entries.get(symbol)
+            if entry is None and len(self._entries) >= WATCHLIST_MAX_SYMBOLS:
+                raise WatchlistFullError(f'Watchlist is limited to {WATCHLIST_MAX_SYMBOLS} symbols')
+            if entry is None:
+                entry = {'symbol': symbol, 'addedAt': time.time()}
+                # New symbols refresh straight away so the first query is warm.
+                entry.update(self._runtime_fields(time.time()))
+                self._entries[symbol] = entry
+            entry['companyName'] = company_name
+            entry['sector'] = sector or 'General'
+            entry['drhpUrl'] = drhp_url or ''
+            self._save()
+            public = self._public(entry)
+        self._wakeup.set()
+        return public
+    
+    def remove(self, symbol):
+        with self._lock, self._file_lock():
+            self._sync()
+            if self._entries.pop(symbol, None) is None:
+                return False
+            self._results.pop(symbol, None)
+            self._save()
+            return True
+    
+    def _public(self, entry):
+        public = dict(entry)
+        public['hasResult'] = entry['symbol'] in self._results
+        return public
+    
+    def watchlist(self):
+        with self._lock:
+            self._sync()
+            return [self._public(entry) for entry in sorted(self._entries.values(), key=lambda entry: entry['nextRunAt'])]
+    
+    def latest(self, symbol, max_age=None):
+        with self._lock:
+            stored = self._results.get(symbol)
+        if stored is None:
+            return None
+        result, refreshed_at = stored
+        if max_age is not None and time.time() - refreshed_at > max_age:
+            return None
+        return dict(result)
+    
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='watchlist-refresh')
+            self._thread = threading.Thread(target=self._run, name='watchlist-scheduler', daemon=True)
+            self._thread.start()
+    
+    def stop(self, wait=True):
+        with self._lock:
+            thread, executor = self._thread, self._executor
+            self._thread = None
+            self._executor = None
+        if thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        thread.join()
+        executor.shutdown(wait=wait, cancel_futures=True)
+        if self._leader_file is not None:
+            self._leader_file.close()
+            self._leader_file = None
+    
+    def _run(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                self._sync()
+            if not self._is_leader():
+                self._wakeup.wait(timeout=30)
+                self._wakeup.clear()
+                continue
+            
+            now = time.time()
+            due = []
+            with self._lock:
+                running = sum(1 for entry in self._entries.values() if entry['running'])
+                waiting = sorted((entry for entry in self._entries.values() if not entry['running']), key=lambda entry: entry['nextRunAt'])
+                for entry in waiting:
+                    if entry['nextRunAt'] > now or running >= self.max_concurrency:
+                        break
+                    entry['running'] = True
+                    running += 1
+                    due.append(dict(entry))
+                next_run_at = min((entry['nextRunAt'] for entry in waiting if not entry['running']), default=now + self.interval)
+                if running >= self.max_concurrency:
+                    # Every slot is busy; a finishing refresh sets the wakeup.
+                    next_run_at = now + 60
+                executor = self._executor
+            
+            for entry in due:
+                executor.submit(self._refresh, entry)
+            
+            # Woken early when a symbol is added or a refresh finishes and
+            # frees a slot.
+            self._wakeup.wait(timeout=min(max(next_run_at - now, 0.05), 60))
+            self._wakeup.clear()
+    
+    def _refresh(self, entry):
+        start = time.perf_counter()
+        try:
+            result = self.refresh_fn(entry)
+            status = 'ok'
+        except Exception:
+            result = None
+            status = 'error'
+        elapsed_ms = round((time.perf_counter() - start) * 1000)
+        
+        with self._lock:
+            current = self._entries.get(entry['symbol'])
+            if current is not None:
+                current['running'] = False
+                current['lastRunAt'] = time.time()
+                current['lastStatus'] = status
+                current['lastElapsedMs'] = elapsed_ms
+                current['nextRunAt'] = time.time() + self._jittered_interval()
+                if result is not None:
+                    self._results[entry['symbol']] = (result, time.time())
+            self._stats['runs'] += 1
+            self._stats['failures'] += status != 'ok'
+            self._stats['lastRunAt'] = time.time()
+        self._wakeup.set()
+    
+    def stats(self):
+        with self._lock:
+            return {
+                **self._stats,
+                'symbols': len(self._entries),
+                'running': sum(1 for entry in self._entries.values() if entry['running']),
+                'results': len(self._results),
+                'intervalSeconds': self.interval,
+                'maxConcurrency': self.max_concurrency,
+                'active': self._thread is not None,
+                'leader': self._leader_file is not None or (fcntl is None and self._thread is not None)
+            }
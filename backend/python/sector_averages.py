@@ -0,0 +1,119 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from pathlib import Path
+
+SECTOR_AVERAGES_TTL_SECONDS = float(os.getenv('SECTOR_AVERAGES_TTL_SECONDS', 600))
+# Optional file shared by every server process. invalidate() touches it,
+# and each process reloads once it sees the mtime change.
+SECTOR_AVERAGES_STAMP_PATH = os.getenv('SECTOR_AVERAGES_STAMP_PATH', '')
+
+class SectorAveragesCache:
+    def __init__(self, loader, ttl_seconds=None, stamp_path=None):
+        self.loader = loader
+        self.ttl = SECTOR_AVERAGES_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        stamp_path = SECTOR_AVERAGES_STAMP_PATH if stamp_path is None else stamp_path
+        self.stamp_path = Path(stamp_path) if stamp_path else None
+        self._load_lock = threading.Lock()
+        # (rows, rows by sector, etag), swapped as one tuple so a reader
+        # never pairs one load's rows with another load's etag.
+        self._snapshot = None
+        self._loaded_at = None
+        self._expires_at = 0.0
+        self._loaded_stamp = None
+        self._stats = {
+            'loads': 0,
+            'failures': 0,
+            'reads': 0
+        }
+    
+    def load(self):
+        with self._load_lock:
+            return self._load()
+    
+    def _stamp(self):
+        if self.stamp_path is None:
+            return None
+        try:
+            return self.stamp_path.stat().st_mtime_ns
+        except OSError:
+            return None
+    
+    def _load(self):
+        # Read before loading, so an invalidation that lands mid-load
+        # triggers another one.
+        stamp = self._stamp()
+        try:
+            rows = list(self.loader() or [])
+        except Exception:
+            self._stats['failures'] += 1
+            # Keep serving the previous snapshot, but retry sooner than a full TTL.
+            self._expires_at = time.monotonic() + min(self.ttl, 30)
+            return False
+        
+        payload = json.dumps(rows, sort_keys=True, default=str).encode('utf-8')
+        etag = hashlib.sha256(payload).hexdigest()[:32]
+        self._snapshot = (rows, {row.get('sector'): row for row in rows}, etag)
+        self._loaded_at = time.time()
+        self._loaded_stamp = stamp
+        self._expires_at = time.monotonic() + self.ttl
+        self._stats['loads'] += 1
+        return True
+    
+    def _is_fresh(self):
+        return time.monotonic() < self._expires_at and self._stamp() == self._loaded_stamp
+    
+    def _ensure_fresh(self):
+        if self._snapshot is not None and self._is_fresh():
+            return
+        if self._snapshot is None:
+            with self._load_lock:
+                if self._snapshot is None:
+                    self._load()
+            return
+        # One reader reloads an expired snapshot; the rest keep using the
+        # old one instead of queueing behind the round trip.
+        if self._load_lock.acquire(blocking=False):
+            try:
+                if not self._is_fresh():
+                    self._load()
+            finally:
+                self._load_lock.release()
+    
+    def invalidate(self):
+        if self.stamp_path is not None:
+            try:
+                self.stamp_path.parent.mkdir(parents=True, exist_ok=True)
+                self.stamp_path.touch()
+            except OSError:
+                pass
+        self._expires_at = 0.0
+        return self.load()
+    
+    def snapshot(self):
+        self._ensure_fresh()
+        self._stats['reads'] += 1
+        if self._snapshot is None:
+            return None, None
+        rows, _, etag = self._snapshot
+        return rows, etag
+    
+    def get(self, sector):
+        self._ensure_fresh()
+        self._stats['reads'] += 1
+        if self._snapshot is None:
+            return None
+        return self._snapshot[1].get(sector)
+    
+    def stats(self):
+        rows, _, etag = self._snapshot or ([], None, None)
+        return {
+            **self._stats,
+            'sectors': len(rows),
+            'etag': etag,
+            'loadedAt': self._loaded_at,
+            'ttlSeconds': self.ttl,
+            'shared': self.stamp_path is not None
+        }
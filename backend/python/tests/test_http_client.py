@@ -0,0 +1,147 @@
+import sys
+import time
+import threading
+import unittest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+import http_client
+
+class StandInHandler(BaseHTTPRequestHandler):
+    # Keeps connections open between requests like a real API would.
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    hits = {}
+    hits_lock = threading.Lock()
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send(self, status, headers=None):
+        body = b'{"ok": true}' if status == 200 else b'{}'
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _hit(self):
+        with self.hits_lock:
+            seen = self.hits.get(self.path, 0)
+            self.hits[self.path] = seen + 1
+        return seen
+    
+    def _respond(self):
+        # /flaky/<n> fails n times with a 503, /limited/<seconds> answers
+        # its first request with a 429 and that Retry-After.
+        parts = self.path.strip('/').split('/')
+        seen = self._hit()
+        if parts[0] == 'flaky' and seen < int(parts[1]):
+            return self._send(503)
+        if parts[0] == 'limited' and seen == 0:
+            return self._send(429, {'Retry-After': parts[1]})
+        self._send(200)
+    
+    def do_GET(self):
+        self._respond()
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        self._respond()
+
+class HttpClientTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.port = cls.server.server_address[1]
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        self.saved = (dict(http_client.HOST_RATE_LIMITS), http_client.HTTP_BACKOFF_SECONDS)
+        http_client.HOST_RATE_LIMITS['127.0.0.1'] = (1e6, 1000000)
+        http_client.HTTP_BACKOFF_SECONDS = 0.01
+        http_client._buckets.clear()
+        http_client._host_stats.clear()
+        http_client._session = None
+        StandInHandler.hits.clear()
+    
+    def tearDown(self):
+        limits, http_client.HTTP_BACKOFF_SECONDS = self.saved
+        http_client.HOST_RATE_LIMITS.clear()
+        http_client.HOST_RATE_LIMITS.update(limits)
+        if http_client._session is not None:
+            http_client._session.close()
+    
+    def url(self, path, host='127.0.0.1'):
+        return f'http://{host}:{self.port}{path}'
+    
+    def host_stats(self, host='127.0.0.1'):
+        return http_client.http_client_stats()['hosts'][host]
+    
+    def test_reuses_one_connection(self):
+        for _ in range(20):
+            self.assertEqual(http_client.get(self.url('/ok')).json(), {'ok': True})
+        pool = http_client.http_client_stats()['pools'][f'http://127.0.0.1:{self.port}']
+        self.assertEqual(pool['connectionsOpened'], 1)
+        self.assertEqual(pool['requests'], 20)
+    
+    def test_retries_server_errors(self):
+        response = http_client.get(self.url('/flaky/2'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.host_stats()['retries'], 2)
+        self.assertEqual(StandInHandler.hits['/flaky/2'], 3)
+    
+    def test_gives_up_after_max_retries(self):
+        response = http_client.get(self.url('/flaky/5'), retries=2)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StandInHandler.hits['/flaky/5'], 3)
+    
+    def test_does_not_retry_post(self):
+        response = http_client.request('POST', self.url('/flaky/1'), data=b'x')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(StandInHandler.hits['/flaky/1'], 1)
+    
+    def test_waits_for_retry_after(self):
+        start = time.monotonic()
+        response = http_client.get(self.url('/limited/1'))
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(time.monotonic() - start, 1.0)
+        self.assertEqual(self.host_stats()['retries'], 1)
+    
+    def test_returns_429_when_retry_after_is_too_long(self):
+        start = time.monotonic()
+        response = http_client.get(self.url(f'/limited/{int(http_client.HTTP_BACKOFF_MAX_SECONDS) + 60}'))
+        self.assertEqual(response.status_code, 429)
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(self.host_stats()['retries'], 0)
+    
+    def test_throttles_per_host(self):
+        http_client.HOST_RATE_LIMITS['localhost'] = (20.0, 2)
+        start = time.monotonic()
+        for _ in range(6):
+            http_client.get(self.url('/ok', host='localhost'))
+        elapsed = time.monotonic() - start
+        
+        # Two requests fit in the burst; the other four wait 50ms each.
+        self.assertGreaterEqual(elapsed, 4 / 20.0 * 0.95)
+        self.assertEqual(self.host_stats('localhost')['throttled'], 4)
+        # Another host keeps its own bucket and is not slowed down.
+        http_client.get(self.url('/ok'))
+        self.assertEqual(self.host_stats()['throttled'], 0)
+    
+    def test_refuses_waits_past_the_throttle_limit(self):
+        http_client.HOST_RATE_LIMITS['localhost'] = (0.01, 1)
+        http_client.get(self.url('/ok', host='localhost'))
+        with self.assertRaises(http_client.HttpThrottledError):
+            http_client.get(self.url('/ok', host='localhost'))
+
+if __name__ == '__main__':
+    unittest.main()
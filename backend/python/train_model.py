@@ -4,25 +4,19 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, classification_report
 import pickle
+import os
 from pathlib import Path
+from forest_eval import compile_forest, save_artifact
+from module_a import FEATURE_COLUMNS
 
 script_dir = Path(__file__).parent
 model_path = script_dir / 'ml_model.pkl'
+artifact_dir = script_dir / 'ml_model_artifact'
 
 def train_ipo_model(csv_path):
     df = pd.read_csv(csv_path)
     
-    feature_columns = [
-        'Issue_Size',
-        'QIB_Subscription',
-        'HNI_Subscription',
-        'Retail_Subscription',
-        'PE_Ratio',
-        'OFS_Percentage',
-        'GMP_Listing_Day'
-    ]
-    
-    X = df[feature_columns].fillna(0)
+    X = df[FEATURE_COLUMNS].fillna(0)
     y = df['Positive_Listing_Gain'].astype(int)
     
     X_train, X_test, y_train, y_test = train_test_split(
@@ -47,10 +41,20 @@ def train_ipo_model(csv_path):
     print("\nClassification Report:")
     print(classification_report(y_test, y_pred))
     
-    with open(model_path, 'wb') as f:
+    tmp_path = model_path.with_suffix('.pkl.tmp')
+    with open(tmp_path, 'wb') as f:
         pickle.dump(model, f)
+    os.replace(tmp_path, model_path)
+    
+    metrics = {
+        'accuracy': float(accuracy),
+        'trainRows': int(len(X_train)),
+        'testRows': int(len(X_test))
+    }
+    version = save_artifact(compile_forest(model), artifact_dir, FEATURE_COLUMNS, metrics)
     
     print(f"\nModel saved to {model_path}")
+    print(f"Model artifact {version} saved to {artifact_dir}")
     return model
 
 if __name__ == '__main__':
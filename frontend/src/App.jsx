@@ -3,6 +3,8 @@ import axios from 'axios';
 import { motion } from 'framer-motion';
 import Dashboard from './components/Dashboard';
 import QueryForm from './components/QueryForm';
+import QueryCard from './components/QueryCard';
+import { getSectorAverage } from './sectorAverages';
 import './App.css';
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000/api';
@@ -11,6 +13,7 @@ function App() {
   const [queries, setQueries] = useState([]);
   const [sectorAverages, setSectorAverages] = useState([]);
   const [loading, setLoading] = useState(false);
+  const [liveQuery, setLiveQuery] = useState(null);
 
   useEffect(() => {
     fetchQueries();
@@ -35,14 +38,71 @@ function App() {
     }
   };
 
+  // Reads the server-sent events from /ipo/query/stream and hands each
+  // parsed event to onEvent as it arrives.
+  const readEventStream = async (response, onEvent) => {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+
+        let event = 'message';
+        const data = [];
+        block.split('\n').forEach(line => {
+          if (line.startsWith('event:')) event = line.slice(6).trim();
+          else if (line.startsWith('data:')) data.push(line.slice(5).trim());
+        });
+        if (data.length > 0) onEvent(event, JSON.parse(data.join('\n')));
+      }
+    }
+  };
+
   const handleQuery = async (queryData) => {
     setLoading(true);
+    setLiveQuery({ ...queryData, queryDate: new Date().toISOString() });
     try {
-      const response = await axios.post(`${API_BASE_URL}/ipo/query`, queryData);
+      const response = await fetch(`${API_BASE_URL}/ipo/query/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(queryData)
+      });
+      if (!response.ok) {
+        throw new Error(`Query failed with status ${response.status}`);
+      }
+
+      let result = null;
+      await readEventStream(response, (event, data) => {
+        if (event === 'error') {
+          throw new Error(data.error);
+        }
+        if (event === 'result') {
+          result = data;
+          setLiveQuery(data);
+        } else {
+          // Partial stages (sentiment, drhp, prediction, risk_flags) are
+          // merged in so the card fills in as each one completes.
+          setLiveQuery(current => ({ ...current, ...data }));
+        }
+      });
+      if (!result) {
+        throw new Error('Query stream ended without a result');
+      }
+
       await fetchQueries();
-      return response.data;
+      setLiveQuery(null);
+      return result;
     } catch (error) {
       console.error('Error querying IPO:', error);
+      setLiveQuery(null);
       throw error;
     } finally {
       setLoading(false);
@@ -88,6 +148,20 @@ function App() {
         >
           <QueryForm onQuery={handleQuery} loading={loading} />
         </motion.div>
+
+        {liveQuery && (
+          <motion.div
+            className="live-query"
+            initial={{ opacity: 0, y: 20 }}
+            animate={{ opacity: 1, y: 0 }}
+          >
+            <QueryCard
+              query={liveQuery}
+              sectorAverage={getSectorAverage(sectorAverages, liveQuery.sector)}
+              expanded={Boolean(liveQuery.riskFlags)}
+            />
+          </motion.div>
+        )}
         
         <motion.div
           initial={{ opacity: 0, y: 20 }}
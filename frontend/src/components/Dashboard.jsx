@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { ScatterChart, Scatter, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, Cell } from 'recharts';
 import { motion } from 'framer-motion';
 import QueryCard from './QueryCard';
+import { getSectorAverage } from '../sectorAverages';
 import './Dashboard.css';
 
 function Dashboard({ queries, sectorAverages, onRefresh }) {
@@ -19,11 +20,6 @@ function Dashboard({ queries, sectorAverages, onRefresh }) {
       queryId: q._id
     }));
 
-  const getSectorAverage = (sector) => {
-    const avg = sectorAverages.find(s => s.sector === sector);
-    return avg || { averageOFSRatio: 0.5, averageSentimentScore: 0 };
-  };
-
   const highRiskQueries = queries.filter(q => 
     q.riskFlags?.exceedsSectorAverage === true
   );
@@ -169,7 +165,7 @@ function Dashboard({ queries, sectorAverages, onRefresh }) {
               >
                 <QueryCard 
                   query={query}
-                  sectorAverage={getSectorAverage(query.sector)}
+                  sectorAverage={getSectorAverage(sectorAverages, query.sector)}
                   onClick={() => setSelectedQuery(query)}
                 />
               </motion.div>
@@ -200,7 +196,7 @@ function Dashboard({ queries, sectorAverages, onRefresh }) {
             <button className="close-btn" onClick={() => setSelectedQuery(null)}>×</button>
             <QueryCard 
               query={selectedQuery}
-              sectorAverage={getSectorAverage(selectedQuery.sector)}
+              sectorAverage={getSectorAverage(sectorAverages, selectedQuery.sector)}
               expanded={true}
             />
           </motion.div>
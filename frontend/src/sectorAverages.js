@@ -0,0 +1,4 @@
+export const getSectorAverage = (sectorAverages, sector) => {
+  const avg = sectorAverages.find(s => s.sector === sector);
+  return avg || { averageOFSRatio: 0.5, averageSentimentScore: 0 };
+};